@@ -0,0 +1,211 @@
+import datetime
+
+from django import forms
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.admin.widgets import ForeignKeyRawIdWidget
+from django.core.paginator import Paginator
+from django.db import connections, models
+from django.db.models import Max, Min
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.text import Truncator
+
+
+def estimate_count(queryset):
+    """
+    Примерное число строк таблицы без COUNT(*).
+
+    PostgreSQL хранит оценку в pg_class после VACUUM/ANALYZE; в остальных
+    базах берётся MAX(pk) — чтение по первичному ключу. Удалённые строки
+    завышают оценку, для листания списка это не страшно.
+    """
+    model = queryset.model
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        if row and row[0] > 0:
+            return row[0]
+    return queryset.aggregate(last=Max('pk'))['last'] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """Без фильтров считает страницы по оценке, с фильтрами — точно."""
+
+    @cached_property
+    def count(self):
+        if self.object_list.query.where:
+            return super().count
+        return estimate_count(self.object_list)
+
+
+class DateRangeQuerySet:
+    """
+    Обёртка для иерархии дат в списке админки.
+
+    Стандартная иерархия строит периоды через SELECT DISTINCT по всей
+    выборке. Здесь они берутся из MIN/MAX по индексу даты, поэтому
+    в списке могут оказаться пустые периоды.
+    """
+
+    def __init__(self, queryset):
+        self.queryset = queryset
+
+    def aggregate(self, *args, **kwargs):
+        return self.queryset.aggregate(*args, **kwargs)
+
+    def dates(self, field_name, kind):
+        bounds = self.queryset.aggregate(
+            first=Min(field_name), last=Max(field_name)
+        )
+        if bounds['first'] is None:
+            return []
+        first = timezone.localtime(bounds['first']).date()
+        last = timezone.localtime(bounds['last']).date()
+        if kind == 'day':
+            return [
+                first + datetime.timedelta(days=days)
+                for days in range((last - first).days + 1)
+            ]
+        if kind == 'year':
+            return [
+                datetime.date(year, 1, 1)
+                for year in range(first.year, last.year + 1)
+            ]
+        return [
+            datetime.date(month // 12, month % 12 + 1, 1)
+            for month in range(
+                first.year * 12 + first.month - 1,
+                last.year * 12 + last.month,
+            )
+        ]
+
+
+class PreloadedRawIdWidget(ForeignKeyRawIdWidget):
+    """Подпись рядом с полем id берёт из уже загруженного объекта."""
+
+    related_object = None
+
+    def label_and_url_for_value(self, value):
+        obj = self.related_object
+        if obj is None or str(obj.pk) != str(value):
+            return super().label_and_url_for_value(value)
+        opts = obj._meta
+        try:
+            url = reverse(
+                f'{self.admin_site.name}:{opts.app_label}_'
+                f'{opts.model_name}_change',
+                args=[obj.pk],
+            )
+        except NoReverseMatch:
+            url = ''
+        return Truncator(obj).words(14), url
+
+
+class PreloadedLabelsForm(forms.ModelForm):
+    """
+    Форма строки list_editable: связанные объекты уже подтянуты
+    list_select_related, и виджеты не запрашивают их заново.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name, field in self.fields.items():
+            if isinstance(field.widget, PreloadedRawIdWidget):
+                field.widget.related_object = getattr(
+                    self.instance, name, None
+                )
+
+
+class HighVolumeChangeList(ChangeList):
+    def get_results(self, request):
+        super().get_results(request)
+        if self.date_hierarchy:
+            # После get_results выборку читает только иерархия дат.
+            self.queryset = DateRangeQuerySet(self.queryset)
+
+
+class HighVolumeAdminMixin:
+    """
+    Настройки списков админки для больших таблиц.
+
+    Без фильтров страницы считаются по оценке, полный COUNT(*) для
+    «показать все» не выполняется, иерархия дат не сканирует таблицу.
+    Связанные объекты нужно подтягивать через list_select_related,
+    а для внешних ключей брать raw_id_fields вместо выпадающих списков:
+    в list_editable их подписи берутся из уже загруженных объектов.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return HighVolumeChangeList
+
+    def get_changelist_form(self, request, **kwargs):
+        kwargs.setdefault('form', PreloadedLabelsForm)
+        return super().get_changelist_form(request, **kwargs)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.raw_id_fields:
+            kwargs['widget'] = PreloadedRawIdWidget(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using'),
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+def cascaded_models(model):
+    """Модели, строки которых удаляются каскадом вслед за строкой model."""
+    found, stack = set(), [model]
+    while stack:
+        for relation in stack.pop()._meta.related_objects:
+            related = relation.related_model
+            if (
+                relation.many_to_many
+                or relation.on_delete is not models.CASCADE
+                or related in found
+            ):
+                continue
+            found.add(related)
+            stack.append(related)
+    return found
+
+
+class TombstoneAdminMixin:
+    """
+    Удаление из админки только помечает объект, а зависимые строки
+    вычищаются в фоне.
+
+    Абстрактный: наследник обязан определить tombstone(obj), который
+    помечает объект и ставит вычистку в очередь.
+
+    Страница подтверждения не обходит каскад построчно: на больших
+    объектах именно этот обход и был бы самым долгим. Права проверяются
+    по моделям каскада, как это делает стандартное удаление: без права
+    удалять любую из них удаление запрещено.
+    """
+
+    def delete_model(self, request, obj):
+        self.tombstone(obj)
+
+    def delete_queryset(self, request, queryset):
+        for obj in queryset:
+            self.tombstone(obj)
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        model_count = {self.model._meta.verbose_name_plural: len(objs)}
+        registry = self.admin_site._registry
+        perms_needed = {
+            model._meta.verbose_name
+            for model in cascaded_models(self.model)
+            if model in registry
+            and not registry[model].has_delete_permission(request)
+        }
+        return [str(obj) for obj in objs], model_count, perms_needed, []
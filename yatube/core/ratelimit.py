@@ -0,0 +1,181 @@
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import cache
+from django.http import HttpResponse
+
+UNITS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+DEFAULT_METHODS = ('POST',)
+EWMA_WEIGHT = 0.2
+EWMA_HALF_LIFE = 1.0
+LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def parse_rate(rate):
+    """'10/m' — десять запросов в минуту: лимит и длина окна в секундах."""
+    count, unit = rate.split('/')
+    return int(count), UNITS[unit]
+
+
+def take_token(key, rate, now):
+    """
+    Засчитывает запрос в скользящем окне в общем кеше.
+
+    Возвращает 0, если запрос пропущен, иначе сколько секунд ждать.
+    Счётчик текущего окна растёт атомарным cache.incr, поэтому
+    одновременные запросы одного клиента не проскакивают мимо лимита
+    по одному прочитанному значению. Прошлое окно учитывается с весом
+    оставшейся в нём доли времени — так на стыке окон нельзя сделать
+    двойной лимит. Отклонённый запрос возвращает свой отсчёт.
+    """
+    limit, period = parse_rate(rate)
+    window = int(now // period)
+    current = f'{key}:{window}'
+    cache.add(current, 0, period * 2)
+    try:
+        count = cache.incr(current)
+    except ValueError:
+        # Ключ вытеснили между add и incr.
+        cache.add(current, 1, period * 2)
+        count = 1
+    previous = cache.get(f'{key}:{window - 1}', 0)
+    elapsed = now - window * period
+    weight = 1 - elapsed / period
+    if previous * weight + count <= limit:
+        return 0
+    try:
+        cache.decr(current)
+    except ValueError:
+        pass
+    if count > limit or not previous:
+        return period - elapsed
+    # Ждём, пока вес прошлого окна не освободит место под запрос.
+    return max(period * (1 - (limit - count) / previous) - elapsed, 1)
+
+
+def client_ip(request):
+    return request.META.get('REMOTE_ADDR', '')
+
+
+class LoadShedder:
+    """
+    Скользящее среднее длительности записей в процессе.
+
+    Когда среднее превышает порог, записи отклоняются на cooldown секунд.
+    Пока записи не идут, среднее затухает вдвое за EWMA_HALF_LIFE
+    секунд: иначе оно двигалось бы только от пропущенных запросов,
+    которых во время паузы нет, и после одного всплеска процесс долго
+    отвечал бы 503 уже на быстрые записи.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.average = 0.0
+        self.observed_at = time.monotonic()
+        self.shed_until = 0.0
+
+    def observe(self, duration, threshold, cooldown):
+        now = time.monotonic()
+        with self.lock:
+            idle = max(now - self.observed_at, 0.0)
+            self.average *= 0.5 ** (idle / EWMA_HALF_LIFE)
+            self.observed_at = now
+            self.average += EWMA_WEIGHT * (duration - self.average)
+            if self.average > threshold:
+                self.shed_until = now + cooldown
+
+    def retry_after(self):
+        return max(0.0, self.shed_until - time.monotonic())
+
+
+def check_shared_cache(app_configs, **kwargs):
+    """Лимиты в кеше процесса считаются для каждого процесса отдельно."""
+    backend = settings.CACHES['default']['BACKEND']
+    if settings.RATE_LIMITS and backend in LOCAL_CACHES:
+        return [checks.Warning(
+            'RATE_LIMITS хранятся в кеше одного процесса: с N процессами '
+            'клиент получает N лимитов.',
+            hint='Для продакшена подключите общий кеш: Memcached или Redis.',
+            id='core.W001',
+        )]
+    return []
+
+
+def too_many_requests(wait):
+    response = HttpResponse(
+        'Слишком много запросов, попробуйте позже.',
+        status=429,
+        content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+def service_unavailable(wait):
+    response = HttpResponse(
+        'Сервис перегружен, попробуйте позже.',
+        status=503,
+        content_type='text/plain; charset=utf-8',
+    )
+    response['Retry-After'] = str(math.ceil(wait))
+    return response
+
+
+class RateLimitMiddleware:
+    """
+    Ограничивает частоту записей по политикам из settings.RATE_LIMITS.
+
+    Политика задаётся по имени URL: {'user': '10/m', 'ip': '60/m',
+    'methods': ('POST',)}. Для каждого заданного ключа запрос
+    засчитывается в своём окне; сверх лимита — 429 с Retry-After.
+    Счётчики лежат в кеше default, и общими для всех процессов они будут
+    только с общим бэкендом (Memcached, Redis); LocMem считает в каждом
+    процессе отдельно, о чём предупреждает проверка core.W001. Пока запись
+    в процессе в среднем дольше LOAD_SHEDDING_LATENCY секунд, такие
+    запросы сразу получают 503, не доходя до базы.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.shedder = LoadShedder()
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        started = getattr(request, 'rate_limit_started', None)
+        if started is not None:
+            self.shedder.observe(
+                time.monotonic() - started,
+                settings.LOAD_SHEDDING_LATENCY,
+                settings.LOAD_SHEDDING_COOLDOWN,
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        policy = settings.RATE_LIMITS.get(match.view_name if match else None)
+        if not policy:
+            return None
+        if request.method not in policy.get('methods', DEFAULT_METHODS):
+            return None
+        wait = self.shedder.retry_after()
+        if wait:
+            return service_unavailable(wait)
+        idents = {'ip': client_ip(request)}
+        if request.user.is_authenticated:
+            idents['user'] = request.user.pk
+        now = time.time()
+        for scope in ('user', 'ip'):
+            if scope not in policy or scope not in idents:
+                continue
+            key = f'ratelimit:{match.view_name}:{scope}:{idents[scope]}'
+            wait = take_token(key, policy[scope], now)
+            if wait:
+                return too_many_requests(wait)
+        request.rate_limit_started = time.monotonic()
+        return None
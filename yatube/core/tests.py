@@ -0,0 +1,101 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+from .ratelimit import LoadShedder, take_token
+
+User = get_user_model()
+
+RATE_LIMITS = {
+    'posts:post_create': {'user': '2/m', 'ip': '3/m'},
+    'users:signup': {'ip': '1/h'},
+}
+
+
+@override_settings(RATE_LIMITS=RATE_LIMITS)
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='writer')
+        cls.other = User.objects.create_user(username='other_writer')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def create(self, client):
+        return client.post(reverse('posts:post_create'), {'text': 'Пост'})
+
+    def test_user_bucket(self):
+        """Сверх лимита пользователь получает 429 с Retry-After."""
+        for _ in range(2):
+            self.assertEqual(self.create(self.client).status_code,
+                             HTTPStatus.FOUND)
+        response = self.create(self.client)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_ip_bucket_shared_by_users(self):
+        """Корзина IP общая для всех пользователей с этого адреса."""
+        other_client = Client()
+        other_client.force_login(self.other)
+        self.create(self.client)
+        self.create(self.client)
+        self.create(other_client)
+        response = self.create(other_client)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+
+    def test_reads_not_limited(self):
+        """GET формы создания поста не тратит токены."""
+        for _ in range(5):
+            response = self.client.get(reverse('posts:post_create'))
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_anonymous_signup_limited_by_ip(self):
+        """Регистрация ограничена по IP."""
+        self.client.logout()
+        url = reverse('users:signup')
+        self.client.post(url, {'username': 'first'})
+        response = self.client.post(url, {'username': 'second'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+
+    @override_settings(LOAD_SHEDDING_LATENCY=0)
+    def test_load_shedding(self):
+        """Медленные записи включают 503 для следующих запросов."""
+        self.assertEqual(self.create(self.client).status_code,
+                         HTTPStatus.FOUND)
+        response = self.create(self.client)
+        self.assertEqual(response.status_code,
+                         HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertIn('Retry-After', response)
+
+    def test_window_boundary_not_doubled(self):
+        """На стыке окон прошлое окно ещё занимает лимит."""
+        for _ in range(2):
+            self.assertEqual(take_token('bucket', '2/m', 59.0), 0)
+        self.assertGreater(take_token('bucket', '2/m', 61.0), 0)
+        self.assertEqual(take_token('bucket', '2/m', 91.0), 0)
+
+
+class LoadShedderTests(TestCase):
+    def test_recovers_after_cooldown(self):
+        """После паузы среднее уже затухло, и быстрая запись не тормозит."""
+        with mock.patch('core.ratelimit.time.monotonic') as monotonic:
+            monotonic.return_value = 100.0
+            shedder = LoadShedder()
+            for _ in range(10):
+                shedder.observe(3.0, threshold=1.0, cooldown=5)
+            self.assertGreater(shedder.retry_after(), 0)
+            monotonic.return_value = 105.0
+            self.assertEqual(shedder.retry_after(), 0)
+            shedder.observe(0.05, threshold=1.0, cooldown=5)
+            self.assertEqual(shedder.retry_after(), 0)
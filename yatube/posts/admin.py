@@ -1,8 +1,25 @@
-from django.contrib import admin
-from .models import Post, Group, Follow, Comment
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
 
+from core.admin import HighVolumeAdminMixin, TombstoneAdminMixin
+from . import tasks
+from .deletion import delete_group
+from .models import Post, Group, Follow, Comment, PostSignature, User
+from .search import search_posts
+from .threads import delete_subtrees
 
-class PostAdmin(admin.ModelAdmin):
+
+class PostActionForm(ActionForm):
+    group = forms.CharField(
+        label='slug группы', required=False, max_length=50
+    )
+    author = forms.CharField(
+        label='Имя автора', required=False, max_length=150
+    )
+
+
+class PostAdmin(HighVolumeAdminMixin, admin.ModelAdmin):
     list_display = (
         "pk",
         "text",
@@ -11,17 +28,110 @@ class PostAdmin(admin.ModelAdmin):
         "group",
     )
     list_editable = ("group",)
+    list_select_related = ("author", "group")
+    raw_id_fields = ("author", "group")
     search_fields = ("text",)
     list_filter = ("pub_date",)
+    date_hierarchy = "pub_date"
+    empty_value_display = "-пусто-"
+    action_form = PostActionForm
+    actions = ("delete_in_background", "move_to_group", "reassign_author")
+
+    def get_actions(self, request):
+        # Стандартное удаление идёт одной транзакцией в запросе,
+        # для больших выборок его заменяет delete_in_background.
+        actions = super().get_actions(request)
+        actions.pop("delete_selected", None)
+        return actions
+
+    def enqueue(self, request, queryset, job, *args):
+        post_ids = list(queryset.order_by("pk").values_list("pk", flat=True))
+        task = job.delay(post_ids, *args)
+        self.message_user(
+            request,
+            f"Постов в обработке: {len(post_ids)}. Прогресс — "
+            f"в задаче №{task.pk} раздела «Задачи».",
+        )
+
+    def delete_in_background(self, request, queryset):
+        self.enqueue(request, queryset, tasks.delete_posts)
+    delete_in_background.short_description = "Удалить в фоне"
+    delete_in_background.allowed_permissions = ("delete",)
+
+    def move_to_group(self, request, queryset):
+        slug = request.POST.get("group", "").strip()
+        group = Group.objects.filter(slug=slug).first()
+        if group is None:
+            self.message_user(
+                request, f"Группа «{slug}» не найдена.", messages.ERROR
+            )
+            return
+        self.enqueue(request, queryset, tasks.move_posts, group.pk)
+    move_to_group.short_description = "Перенести в группу (slug)"
+    move_to_group.allowed_permissions = ("change",)
+
+    def reassign_author(self, request, queryset):
+        username = request.POST.get("author", "").strip()
+        author = User.objects.filter(username=username).first()
+        if author is None:
+            self.message_user(
+                request, f"Автор «{username}» не найден.", messages.ERROR
+            )
+            return
+        self.enqueue(request, queryset, tasks.reassign_posts, author.pk)
+    reassign_author.short_description = "Передать автору (имя)"
+    reassign_author.allowed_permissions = ("change",)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search_posts(queryset, search_term), False
+
+
+class GroupAdmin(TombstoneAdminMixin, admin.ModelAdmin):
+    list_display = ("pk", "title", "slug", "description", "is_deleted")
+    list_filter = ("is_deleted",)
+    empty_value_display = "-пусто-"
+
+    def tombstone(self, obj):
+        delete_group(obj)
+
+
+class CommentAdmin(HighVolumeAdminMixin, admin.ModelAdmin):
+    list_display = ("pk", "text", "created", "author", "post")
+    list_select_related = ("author", "post")
+    raw_id_fields = ("author", "post")
     empty_value_display = "-пусто-"
 
+    def delete_model(self, request, obj):
+        delete_subtrees([obj])
 
-class GroupAdmin(admin.ModelAdmin):
-    list_display = ("pk", "title", "slug", "description")
+    def delete_queryset(self, request, queryset):
+        delete_subtrees(queryset)
+
+
+class FollowAdmin(HighVolumeAdminMixin, admin.ModelAdmin):
+    list_display = ("pk", "user", "author", "created")
+    list_select_related = ("user", "author")
+    raw_id_fields = ("user", "author")
+    date_hierarchy = "created"
+    empty_value_display = "-пусто-"
+
+
+class PostSignatureAdmin(HighVolumeAdminMixin, admin.ModelAdmin):
+    list_display = ("post", "author", "pub_date", "duplicate_of")
+    list_select_related = ("post", "author", "duplicate_of")
+    raw_id_fields = ("post", "author", "duplicate_of")
     empty_value_display = "-пусто-"
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).filter(
+            duplicate_of__isnull=False
+        )
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
-admin.site.register(Follow)
-admin.site.register(Comment)
+admin.site.register(Follow, FollowAdmin)
+admin.site.register(Comment, CommentAdmin)
+admin.site.register(PostSignature, PostSignatureAdmin)
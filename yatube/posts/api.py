@@ -0,0 +1,211 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag, urlencode
+from django.views.decorators.http import require_GET, require_POST
+
+from . import autocomplete, follows, notifications
+from .models import Group, Post, User
+from .paginators import get_cursor_page
+
+POST_FIELDS = {
+    'id': 'pk',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'image': 'image',
+}
+COMMENT_FIELDS = {
+    'id': 'pk',
+    'text': 'text',
+    'created': 'created',
+    'author': 'author__username',
+    'parent': 'parent_id',
+}
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def parse_fields(request, available):
+    """Разбирает параметр fields=; без него отдаются все поля."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(available)
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = set(fields) - available.keys()
+    if unknown:
+        raise FieldsError(
+            'Неизвестные поля: ' + ', '.join(sorted(unknown))
+        )
+    return fields
+
+
+def serialize(row, fields, available):
+    data = {name: row[available[name]] for name in fields}
+    if 'image' in data:
+        data['image'] = (
+            settings.MEDIA_URL + data['image'] if data['image'] else None
+        )
+    return data
+
+
+def json_response(request, data):
+    """JSON-ответ с ETag: повторный запрос без изменений получает 304."""
+    body = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False)
+    body = body.encode()
+    etag = quote_etag(hashlib.md5(body).hexdigest())
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    return response
+
+
+def error_response(message, status=400):
+    return JsonResponse(
+        {'error': message},
+        status=status,
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+def paginated_response(request, queryset, available, date_field):
+    """
+    Выбирает из базы только запрошенные поля и отдаёт страницу по курсору.
+
+    Дата и id нужны курсору, поэтому читаются всегда, но в ответ попадают,
+    только если их попросили.
+    """
+    try:
+        fields = parse_fields(request, available)
+    except FieldsError as error:
+        return error_response(str(error))
+    columns = {available[name] for name in fields} | {date_field, 'pk'}
+    page = get_cursor_page(
+        queryset.values(*columns), request, date_field=date_field
+    )
+    next_url = None
+    if page.has_next:
+        params = request.GET.copy()
+        params['cursor'] = page.next_cursor
+        next_url = f'{request.path}?{urlencode(params)}'
+    return json_response(request, {
+        'results': [serialize(row, fields, available) for row in page],
+        'next': next_url,
+    })
+
+
+@require_GET
+def index(request):
+    return paginated_response(
+        request, Post.objects.visible(), POST_FIELDS, 'pub_date'
+    )
+
+
+@require_GET
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug, is_deleted=False)
+    return paginated_response(
+        request, group.posts.visible(), POST_FIELDS, 'pub_date'
+    )
+
+
+@require_GET
+def profile(request, username):
+    author = get_object_or_404(
+        User, username=username, tombstone__isnull=True
+    )
+    return paginated_response(
+        request, author.posts.visible(), POST_FIELDS, 'pub_date'
+    )
+
+
+@require_GET
+def post_detail(request, post_id):
+    try:
+        fields = parse_fields(request, POST_FIELDS)
+    except FieldsError as error:
+        return error_response(str(error))
+    row = get_object_or_404(
+        Post.objects.visible().values(
+            *{POST_FIELDS[name] for name in fields}
+        ),
+        pk=post_id,
+    )
+    return json_response(request, serialize(row, fields, POST_FIELDS))
+
+
+@require_GET
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.visible().only('pk'), pk=post_id)
+    return paginated_response(
+        request,
+        post.comments.filter(author__tombstone__isnull=True),
+        COMMENT_FIELDS,
+        'created',
+    )
+
+
+@require_POST
+def bulk_follow(request):
+    """
+    Подписки и отписки пачкой: {"follow": [...], "unfollow": [...]}.
+
+    Все изменения применяются в одной транзакции. В ответе — те, на кого
+    подписка действительно появилась или пропала.
+    """
+    if not request.user.is_authenticated:
+        return error_response('Требуется авторизация.', status=401)
+    try:
+        data = json.loads(request.body)
+        follow = list(data.get('follow', []))
+        unfollow = list(data.get('unfollow', []))
+    except (ValueError, TypeError, AttributeError):
+        return error_response('Ожидается JSON-объект со списками.')
+    names = follow + unfollow
+    if not all(isinstance(name, str) for name in names):
+        return error_response('Авторы задаются списками username.')
+    if len(names) > follows.MAX_BULK_FOLLOWS:
+        return error_response(
+            f'Не больше {follows.MAX_BULK_FOLLOWS} авторов за запрос.'
+        )
+    followed, unfollowed = follows.apply_changes(
+        request.user, follow, unfollow
+    )
+    return JsonResponse(
+        {'followed': followed, 'unfollowed': unfollowed},
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+@require_GET
+def unread_notifications(request):
+    if not request.user.is_authenticated:
+        return error_response('Требуется авторизация.', status=401)
+    return JsonResponse(
+        {'unread': notifications.unread_count(request.user)}
+    )
+
+
+@require_GET
+def autocomplete_users(request):
+    results = autocomplete.users.search(request.GET.get('q', ''))
+    return JsonResponse({'results': results})
+
+
+@require_GET
+def autocomplete_groups(request):
+    found = autocomplete.groups.search(request.GET.get('q', ''))
+    results = [{'slug': slug, 'title': title} for slug, title in found]
+    return JsonResponse(
+        {'results': results},
+        json_dumps_params={'ensure_ascii': False},
+    )
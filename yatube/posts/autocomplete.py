@@ -0,0 +1,155 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.core.cache import cache
+
+from .models import Group, User
+
+LIMIT = 10
+REFRESH_INTERVAL = 5
+# Сколько последних изменений хранится в общем кеше. Процесс, отставший
+# сильнее или дольше LOG_TIMEOUT, перестраивает индекс целиком.
+LOG_SIZE = 100
+LOG_TIMEOUT = 60 * 60
+
+
+class PrefixIndex:
+    """
+    Отсортированный массив ключей для поиска по префиксу.
+
+    Поиск — bisect до первого подходящего ключа и проход вперёд, пока
+    ключи начинаются с префикса. В памяти лежат только строки ключей и
+    значений; ключи одного объекта запоминаются по id, чтобы его можно
+    было переиндексировать при переименовании.
+
+    Индекс живёт в памяти процесса. Каждое изменение получает номер
+    версии в общем кеше и записывается туда же под этим номером. Не чаще
+    раза в REFRESH_INTERVAL секунд процесс сверяет версию и применяет
+    пропущенные изменения по одному; полная перестройка нужна, только
+    если часть журнала уже вытеснена или отставание больше LOG_SIZE.
+    """
+
+    def __init__(self, name, load):
+        self.name = name
+        self.load = load
+        self.lock = threading.Lock()
+        self.entries = None
+        self.by_id = {}
+        self.version = None
+        self.checked = 0
+
+    @property
+    def version_key(self):
+        return f'autocomplete_version:{self.name}'
+
+    def change_key(self, version):
+        return f'autocomplete_change:{self.name}:{version}'
+
+    def rebuild(self):
+        entries = []
+        by_id = {}
+        for pk, keys, value in self.load():
+            by_id[pk] = [(key.casefold(), value) for key in keys]
+            entries.extend(by_id[pk])
+        entries.sort()
+        self.entries = entries
+        self.by_id = by_id
+
+    def ensure_fresh(self):
+        now = time.monotonic()
+        if self.entries is not None and now - self.checked < REFRESH_INTERVAL:
+            return
+        with self.lock:
+            version = cache.get(self.version_key)
+            if self.entries is None or not self.catch_up(version):
+                self.rebuild()
+            self.version = version
+            self.checked = now
+
+    def catch_up(self, version):
+        """Применяет изменения других процессов; False — нужна перестройка."""
+        if version == self.version:
+            return True
+        if version is None or self.version is None:
+            return False
+        missed = range(self.version + 1, version + 1)
+        if not 0 < len(missed) <= LOG_SIZE:
+            return False
+        keys = [self.change_key(number) for number in missed]
+        changes = cache.get_many(keys)
+        if len(changes) != len(keys):
+            return False
+        for key in keys:
+            self.apply(*changes[key])
+        return True
+
+    def search(self, prefix, limit=LIMIT):
+        prefix = prefix.casefold()
+        if not prefix:
+            return []
+        self.ensure_fresh()
+        entries = self.entries
+        results = []
+        position = bisect_left(entries, (prefix,))
+        while position < len(entries) and len(results) < limit:
+            key, value = entries[position]
+            if not key.startswith(prefix):
+                break
+            if value not in results:
+                results.append(value)
+            position += 1
+        return results
+
+    def update(self, pk, keys=(), value=None):
+        """Заменяет ключи объекта; без ключей объект удаляется."""
+        keys = list(keys)
+        with self.lock:
+            if self.entries is not None:
+                self.apply(pk, keys, value)
+            version = self.bump()
+            cache.set(
+                self.change_key(version), (pk, keys, value), LOG_TIMEOUT
+            )
+            # Если версию успел поднять другой процесс, его изменения
+            # подтянутся из журнала при следующей сверке.
+            if version == (self.version or 0) + 1:
+                self.version = version
+
+    def apply(self, pk, keys, value):
+        for entry in self.by_id.pop(pk, []):
+            position = bisect_left(self.entries, entry)
+            if (position < len(self.entries)
+                    and self.entries[position] == entry):
+                del self.entries[position]
+        if keys:
+            self.by_id[pk] = [(key.casefold(), value) for key in keys]
+            for entry in self.by_id[pk]:
+                insort(self.entries, entry)
+
+    def bump(self):
+        try:
+            return cache.incr(self.version_key)
+        except ValueError:
+            cache.set(self.version_key, 1, None)
+            return 1
+
+
+def load_users():
+    users = User.objects.filter(tombstone__isnull=True).values_list(
+        'pk', 'username'
+    )
+    for pk, username in users.iterator():
+        yield pk, [username], username
+
+
+def load_groups():
+    groups = Group.objects.filter(is_deleted=False).values_list(
+        'pk', 'slug', 'title'
+    )
+    for pk, slug, title in groups.iterator():
+        yield pk, [slug, title], (slug, title)
+
+
+users = PrefixIndex('users', load_users)
+groups = PrefixIndex('groups', load_groups)
@@ -0,0 +1,79 @@
+from functools import partial
+
+from django.db import transaction
+
+from tasks.queue import report_progress
+
+from .models import Comment, Post, PostSignature
+from .signals import batched_invalidation, remember_posts
+
+CHUNK_SIZE = 500
+
+
+def chunks(post_ids, chunk_size=None):
+    chunk_size = chunk_size or CHUNK_SIZE
+    post_ids = sorted(post_ids)
+    for start in range(0, len(post_ids), chunk_size):
+        yield post_ids[start:start + chunk_size]
+
+
+def process(post_ids, handler, chunk_size=None):
+    """
+    Применяет handler к постам пачками по chunk_size.
+
+    Каждая пачка — своя короткая транзакция, так что база не блокируется
+    на всё время операции, а упавшая задача при повторе продолжает
+    с оставшихся строк: все обработчики идемпотентны. Кеши лент
+    сбрасываются раз на пачку, прогресс пишется в задачу очереди.
+    """
+    done = 0
+    report_progress(done, len(post_ids))
+    for chunk in chunks(post_ids, chunk_size):
+        # Кеши сбрасываются после коммита, иначе читатель успел бы
+        # закешировать старые данные заново.
+        with batched_invalidation(), transaction.atomic():
+            handler(chunk)
+        done += len(chunk)
+        report_progress(done)
+    return done
+
+
+def current_rows(chunk):
+    return Post.objects.filter(pk__in=chunk).values_list(
+        'pk', 'author_id', 'group_id'
+    )
+
+
+def delete_chunk(chunk):
+    # У комментариев нет сигналов и зависимых моделей, поэтому это один
+    # DELETE без загрузки строк в память. Посты же коллектор загружает
+    # ради сигналов, но не больше CHUNK_SIZE за раз.
+    Comment.objects.filter(post_id__in=chunk).delete()
+    Post.objects.filter(pk__in=chunk).delete()
+
+
+def move_chunk(chunk, group_id):
+    remember_posts(current_rows(chunk))
+    Post.objects.filter(pk__in=chunk).update(group_id=group_id)
+    remember_posts(current_rows(chunk))
+
+
+def reassign_chunk(chunk, author_id):
+    remember_posts(current_rows(chunk))
+    Post.objects.filter(pk__in=chunk).update(author_id=author_id)
+    PostSignature.objects.filter(post_id__in=chunk).update(
+        author_id=author_id
+    )
+    remember_posts(current_rows(chunk))
+
+
+def delete_posts(post_ids):
+    return process(post_ids, delete_chunk)
+
+
+def move_posts(post_ids, group_id):
+    return process(post_ids, partial(move_chunk, group_id=group_id))
+
+
+def reassign_posts(post_ids, author_id):
+    return process(post_ids, partial(reassign_chunk, author_id=author_id))
@@ -0,0 +1,113 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.db.models import F
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """
+    Буфер просмотров постов в памяти процесса.
+
+    Просмотр только увеличивает счётчик в словаре, в базу запрос не
+    уходит никогда. Накопленное записывает фоновый поток процесса: раз в
+    VIEW_COUNT_FLUSH_INTERVAL секунд или сразу, когда в буфере набралось
+    VIEW_COUNT_FLUSH_SIZE постов. Посты с одинаковым приростом
+    обновляются одним UPDATE ... SET views = views + n. Если запись
+    не удалась, прирост возвращается в буфер до следующей попытки;
+    при штатной остановке процесса буфер записывается из atexit.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.flushed_at = time.monotonic()
+        self.wakeup = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Запускает фоновую запись; повторные вызовы ничего не делают."""
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.thread = threading.Thread(
+                target=self.run, name='view-counter', daemon=True
+            )
+        self.thread.start()
+        atexit.register(self.flush)
+
+    def run(self):
+        while True:
+            self.wakeup.wait(settings.VIEW_COUNT_FLUSH_INTERVAL)
+            self.wakeup.clear()
+            if not self.due():
+                continue
+            try:
+                self.flush()
+            finally:
+                # Соединения этого потока не должны висеть между записями.
+                connections.close_all()
+
+    def due(self):
+        with self.lock:
+            return bool(self.pending) and (
+                len(self.pending) >= settings.VIEW_COUNT_FLUSH_SIZE
+                or time.monotonic() - self.flushed_at
+                >= settings.VIEW_COUNT_FLUSH_INTERVAL
+            )
+
+    def record(self, post_id):
+        with self.lock:
+            self.pending[post_id] += 1
+            full = len(self.pending) >= settings.VIEW_COUNT_FLUSH_SIZE
+        if full:
+            self.wakeup.set()
+
+    def buffered(self, post_id):
+        """Просмотры поста, ещё не записанные этим процессом."""
+        return self.pending.get(post_id, 0)
+
+    def flush(self):
+        """Записывает буфер; возвращает число записанных просмотров."""
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+            self.flushed_at = time.monotonic()
+        if not pending:
+            return 0
+        by_delta = defaultdict(list)
+        for post_id, delta in pending.items():
+            by_delta[delta].append(post_id)
+        try:
+            with transaction.atomic():
+                for delta, post_ids in by_delta.items():
+                    Post.objects.filter(pk__in=post_ids).update(
+                        views=F('views') + delta
+                    )
+        except DatabaseError:
+            logger.warning(
+                'Не удалось записать просмотры %s постов, повторим позже.',
+                len(pending), exc_info=True,
+            )
+            with self.lock:
+                self.pending.update(pending)
+            return 0
+        return sum(pending.values())
+
+
+views = ViewCounter()
+
+
+def record_view(post):
+    """Засчитывает просмотр и возвращает счётчик с учётом буфера."""
+    views.start()
+    shown = post.views + views.buffered(post.pk) + 1
+    views.record(post.pk)
+    return shown
@@ -0,0 +1,111 @@
+from django.apps import apps
+from django.db import models, transaction
+
+from tasks.queue import report_progress, task
+
+from . import bulk, likes, sitemaps, threads
+from .models import Comment, Group, Like, Post, User, UserTombstone
+from .signals import batched_invalidation
+from .versions import bump_versions
+
+CHUNK_SIZE = 500
+
+
+def delete_user(user):
+    """
+    Удаляет пользователя без долгой блокировки базы.
+
+    Пользователь сразу помечается удалённым и деактивируется: его посты,
+    комментарии и профиль пропадают из лент и API. Сами строки вычищает
+    фоновая задача reap.
+    """
+    group_slugs = list(Group.objects.filter(
+        posts__author=user
+    ).values_list('slug', flat=True).distinct())
+    with transaction.atomic():
+        UserTombstone.objects.get_or_create(user=user)
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        reap.delay(User._meta.label, user.pk)
+    bump_versions(
+        ['index', f'author:{user.username}']
+        + [f'group:{slug}' for slug in group_slugs]
+    )
+    sitemaps.invalidate_posts(Post.objects.filter(author=user))
+
+
+def delete_group(group):
+    """
+    Удаляет группу без одного огромного UPDATE ... SET group_id = NULL.
+
+    Группа сразу помечается удалённой и перестаёт открываться, посты
+    отвязываются от неё пачками в фоне.
+    """
+    with transaction.atomic():
+        group.is_deleted = True
+        group.save(update_fields=['is_deleted'])
+        reap.delay(Group._meta.label, group.pk)
+    bump_versions([f'group:{group.slug}'])
+
+
+def is_tombstoned(obj):
+    if isinstance(obj, Group):
+        return obj.is_deleted
+    return UserTombstone.objects.filter(user_id=obj.pk).exists()
+
+
+def dependents(model):
+    """Обратные связи, которые при удалении каскадятся или обнуляются."""
+    for relation in model._meta.related_objects:
+        # Пометка снимается последней, вместе с самим объектом.
+        if relation.many_to_many or relation.related_model is UserTombstone:
+            continue
+        if relation.on_delete in (models.CASCADE, models.SET_NULL):
+            yield relation
+
+
+def reap_chunk(relation, chunk):
+    related = relation.related_model
+    field = relation.field.name
+    if related is Post and field == 'group':
+        bulk.move_chunk(chunk, group_id=None)
+    elif related is Post:
+        bulk.delete_chunk(chunk)
+    elif related is Comment and field == 'author':
+        threads.delete_keeping_replies(chunk)
+    elif related is Like and field == 'user':
+        likes.delete_likes(chunk)
+    elif relation.on_delete is models.SET_NULL:
+        related._base_manager.filter(pk__in=chunk).update(**{field: None})
+    else:
+        related._base_manager.filter(pk__in=chunk).delete()
+
+
+@task(priority=-10)
+def reap(label, pk):
+    """
+    Вычищает зависимые строки помеченного объекта, затем его самого.
+
+    Каждая связь обходится пачками по CHUNK_SIZE в отдельных транзакциях,
+    поэтому последний DELETE удаляет уже почти пустой каскад. Если объект
+    успели восстановить, задача ничего не делает.
+    """
+    model = apps.get_model(label)
+    obj = model._base_manager.filter(pk=pk).first()
+    if obj is None or not is_tombstoned(obj):
+        return
+    done = 0
+    for relation in dependents(model):
+        rows = relation.related_model._base_manager.filter(
+            **{relation.field.name: pk}
+        ).order_by('pk').values_list('pk', flat=True)
+        while True:
+            chunk = list(rows[:CHUNK_SIZE])
+            if not chunk:
+                break
+            with batched_invalidation(), transaction.atomic():
+                reap_chunk(relation, chunk)
+            done += len(chunk)
+            report_progress(done)
+    with batched_invalidation(), transaction.atomic():
+        model._base_manager.filter(pk=pk).delete()
@@ -0,0 +1,153 @@
+import hashlib
+import random
+import re
+import struct
+from collections import namedtuple
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import PostSignature
+
+NUM_HASHES = 32
+BANDS = 8
+ROWS = NUM_HASHES // BANDS
+SIMILARITY = 0.6
+MIN_TOKENS = 8
+WINDOW = timedelta(days=30)
+DUPLICATE_ERROR = 'Вы недавно публиковали почти такой же пост.'
+
+TOKEN_RE = re.compile(r'\w+')
+PRIME = (1 << 61) - 1
+HASH_MASK = 0xFFFFFFFF
+BAND_MASK = 0x7FFFFFFF
+SIGNATURE_FORMAT = f'>{NUM_HASHES}I'
+
+# Коэффициенты перестановок фиксированы: подписи, посчитанные разными
+# процессами и в разное время, должны быть сравнимы.
+_random = random.Random(20240101)
+PERMUTATIONS = [
+    (_random.randrange(1, PRIME), _random.randrange(PRIME))
+    for _ in range(NUM_HASHES)
+]
+
+Duplicate = namedtuple('Duplicate', ['post_id', 'author_id', 'similarity'])
+
+
+def tokens(text):
+    return set(TOKEN_RE.findall(text.casefold()))
+
+
+def minhash(text):
+    """
+    MinHash-подпись множества слов текста: NUM_HASHES минимумов.
+
+    Доля совпавших позиций у двух подписей оценивает коэффициент
+    Жаккара их словарей. Для слишком коротких текстов возвращает None:
+    у них почти всё похоже на что угодно.
+    """
+    words = tokens(text)
+    if len(words) < MIN_TOKENS:
+        return None
+    hashes = [
+        int.from_bytes(
+            hashlib.blake2b(word.encode(), digest_size=8).digest(), 'big'
+        )
+        for word in words
+    ]
+    return [
+        min((a * value + b) % PRIME for value in hashes) & HASH_MASK
+        for a, b in PERMUTATIONS
+    ]
+
+
+def bands(signature):
+    """
+    LSH: подпись режется на BANDS полос по ROWS значений.
+
+    Похожие тексты с большой вероятностью совпадают хотя бы в одной
+    полосе, поэтому кандидаты ищутся равенством по индексам полос,
+    а не перебором всех постов.
+    """
+    packed = struct.pack(SIGNATURE_FORMAT, *signature)
+    size = ROWS * 4
+    return [
+        int.from_bytes(hashlib.blake2b(
+            packed[i * size:(i + 1) * size], digest_size=4
+        ).digest(), 'big') & BAND_MASK
+        for i in range(BANDS)
+    ]
+
+
+def similarity(first, second):
+    return sum(a == b for a, b in zip(first, second)) / NUM_HASHES
+
+
+def find_duplicate(text, author_id, exclude=None, before=None):
+    """
+    Ищет похожий пост за WINDOW до момента before (по умолчанию — сейчас).
+
+    Возвращает Duplicate или None. Пост самого автора предпочтительнее
+    чужого, среди равных — самый похожий. Бэкфилл передаёт в before дату
+    проверяемого поста, чтобы старые копии сравнивались со своими
+    ровесниками.
+    """
+    if before is None:
+        before = timezone.now()
+    signature = minhash(text)
+    if signature is None:
+        return None
+    condition = Q()
+    for i, band in enumerate(bands(signature)):
+        condition |= Q(**{f'band{i}': band})
+    candidates = PostSignature.objects.filter(
+        condition, pub_date__range=(before - WINDOW, before)
+    ).values_list('post_id', 'author_id', 'minhash')
+    if exclude is not None:
+        candidates = candidates.exclude(post_id=exclude)
+    found = []
+    for post_id, other_author_id, packed in candidates:
+        other = struct.unpack(SIGNATURE_FORMAT, bytes(packed))
+        score = similarity(signature, other)
+        if score >= SIMILARITY:
+            found.append(Duplicate(post_id, other_author_id, score))
+    if not found:
+        return None
+    return min(found, key=lambda duplicate: (
+        duplicate.author_id != author_id, -duplicate.similarity
+    ))
+
+
+def build_signature(post, duplicate=None):
+    signature = minhash(post.text)
+    if signature is None:
+        return None
+    return PostSignature(
+        post=post,
+        author_id=post.author_id,
+        minhash=struct.pack(SIGNATURE_FORMAT, *signature),
+        pub_date=post.pub_date,
+        duplicate_of_id=duplicate.post_id if duplicate else None,
+        **{f'band{i}': band for i, band in enumerate(bands(signature))},
+    )
+
+
+def index_signatures(posts, duplicates=None):
+    """
+    Перестраивает подписи для пачки постов двумя запросами.
+
+    duplicates — необязательный {post_id: Duplicate} для пометки похожих.
+    """
+    posts = list(posts)
+    if not posts:
+        return
+    duplicates = duplicates or {}
+    PostSignature.objects.filter(post__in=posts).delete()
+    signatures = [
+        build_signature(post, duplicate=duplicates.get(post.pk))
+        for post in posts
+    ]
+    PostSignature.objects.bulk_create(
+        signature for signature in signatures if signature is not None
+    )
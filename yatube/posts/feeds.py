@@ -0,0 +1,148 @@
+from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse, reverse_lazy
+from django.utils.cache import get_conditional_response
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+
+from .models import Group, Post, User
+from .versions import get_version
+
+FEED_SIZE = 20
+FEED_TIMEOUT = 60 * 60
+TITLE_LENGTH = 60
+
+
+def post_scopes(post, group_slug=None):
+    """Ленты, в которые попадает пост."""
+    scopes = ['index', f'author:{post.author.username}']
+    if group_slug:
+        scopes.append(f'group:{group_slug}')
+    return scopes
+
+
+def cached_feed(feed, scope):
+    """
+    Оборачивает ленту кешем и условным GET.
+
+    ETag строится из версии ленты, поэтому запрос с актуальным
+    If-None-Match получает 304 без единого обращения к базе, а тело
+    рендерится только один раз на версию.
+    """
+    def view(request, **kwargs):
+        current = scope(**kwargs)
+        version = get_version(current)
+        etag = f'"{current}-{version}-{feed.feed_type.__name__}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            key = f'feed:{current}:{version}:{feed.feed_type.__name__}'
+            cached = cache.get(key)
+            if cached is None:
+                rendered = feed(request, **kwargs)
+                cached = (rendered.content, rendered['Content-Type'])
+                cache.set(key, cached, FEED_TIMEOUT)
+            response = HttpResponse(cached[0], content_type=cached[1])
+        response['ETag'] = etag
+        return response
+    return view
+
+
+class LatestPostsFeed(Feed):
+    title = 'Yatube: последние записи'
+    link = reverse_lazy('posts:index')
+    description = 'Новые записи всех авторов Yatube'
+
+    def items(self):
+        return Post.objects.for_feed()[:FEED_SIZE]
+
+    def item_title(self, item):
+        return Truncator(item.text).chars(TITLE_LENGTH)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=[item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug, is_deleted=False)
+
+    def title(self, group):
+        return f'Yatube: {group.title}'
+
+    def link(self, group):
+        return reverse('posts:group_list', args=[group.slug])
+
+    def description(self, group):
+        return group.description
+
+    def items(self, group):
+        return group.posts.for_feed()[:FEED_SIZE]
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(
+            User, username=username, tombstone__isnull=True
+        )
+
+    def title(self, author):
+        return f'Yatube: записи {author.get_full_name() or author.username}'
+
+    def link(self, author):
+        return reverse('posts:profile', args=[author.username])
+
+    def description(self, author):
+        return self.title(author)
+
+    def items(self, author):
+        return author.posts.for_feed()[:FEED_SIZE]
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, group):
+        return group.description
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, author):
+        return self.title(author)
+
+
+def index_scope():
+    return 'index'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+index_rss = cached_feed(LatestPostsFeed(), index_scope)
+index_atom = cached_feed(LatestPostsAtomFeed(), index_scope)
+group_rss = cached_feed(GroupPostsFeed(), group_scope)
+group_atom = cached_feed(GroupPostsAtomFeed(), group_scope)
+author_rss = cached_feed(AuthorPostsFeed(), author_scope)
+author_atom = cached_feed(AuthorPostsAtomFeed(), author_scope)
@@ -0,0 +1,106 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.dispatch import Signal, receiver
+
+from .models import Follow, User
+
+MAX_BULK_FOLLOWS = 100
+COUNT_TIMEOUT = 60 * 60
+
+# Отправляется после коммита: user — подписчик, added и removed — id
+# авторов, подписка на которых действительно появилась или пропала.
+follows_changed = Signal(providing_args=['user', 'added', 'removed'])
+
+
+def follow_many(user, author_ids):
+    """
+    Подписывает user на авторов одной вставкой.
+
+    Уже существующие подписки не мешают: INSERT пропускает конфликты
+    с unique_follower, поэтому одновременные клики не падают
+    с IntegrityError. Возвращает id авторов, подписка на которых
+    появилась (при гонке повторный клик может попасть в оба списка).
+    """
+    author_ids = set(User.objects.filter(
+        pk__in=set(author_ids) - {user.pk}, is_active=True
+    ).values_list('pk', flat=True))
+    if not author_ids:
+        return []
+    with transaction.atomic():
+        existing = set(Follow.objects.filter(
+            user=user, author_id__in=author_ids
+        ).values_list('author_id', flat=True))
+        added = sorted(author_ids - existing)
+        Follow.objects.bulk_create(
+            [Follow(user=user, author_id=pk) for pk in added],
+            ignore_conflicts=True,
+        )
+        notify(user, added=added)
+    return added
+
+
+def unfollow_many(user, author_ids):
+    """Отписывает user от авторов одним DELETE; возвращает их id."""
+    with transaction.atomic():
+        follows = Follow.objects.filter(user=user, author_id__in=author_ids)
+        removed = sorted(follows.values_list('author_id', flat=True))
+        follows.delete()
+        notify(user, removed=removed)
+    return removed
+
+
+def apply_changes(user, follow=(), unfollow=()):
+    """Применяет пачку подписок и отписок по username в одной транзакции."""
+    usernames = set(follow) | set(unfollow)
+    ids = dict(User.objects.filter(
+        username__in=usernames
+    ).values_list('username', 'pk'))
+    with transaction.atomic():
+        added = follow_many(
+            user, [ids[name] for name in follow if name in ids]
+        )
+        removed = unfollow_many(
+            user, [ids[name] for name in unfollow if name in ids]
+        )
+    names = {pk: name for name, pk in ids.items()}
+    return [names[pk] for pk in added], [names[pk] for pk in removed]
+
+
+def notify(user, added=(), removed=()):
+    if added or removed:
+        transaction.on_commit(lambda: follows_changed.send(
+            sender=Follow, user=user, added=added, removed=removed
+        ))
+
+
+def count_key(kind, user_id):
+    return f'follow_count:{kind}:{user_id}'
+
+
+def follow_counts(user):
+    """Число подписчиков и подписок; COUNT(*) — только при промахе кеша."""
+    keys = {
+        'followers': count_key('followers', user.pk),
+        'following': count_key('following', user.pk),
+    }
+    cached = cache.get_many(keys.values())
+    counts = {}
+    for kind, key in keys.items():
+        if key in cached:
+            counts[kind] = cached[key]
+            continue
+        if kind == 'followers':
+            counts[kind] = Follow.objects.filter(author=user).count()
+        else:
+            counts[kind] = Follow.objects.filter(user=user).count()
+        cache.set(key, counts[kind], COUNT_TIMEOUT)
+    return counts
+
+
+@receiver(follows_changed)
+def drop_follow_counts(sender, user, added, removed, **kwargs):
+    """Сбрасывает счётчики всех затронутых пользователей одним вызовом."""
+    cache.delete_many(
+        [count_key('following', user.pk)]
+        + [count_key('followers', pk) for pk in [*added, *removed]]
+    )
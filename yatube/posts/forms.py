@@ -1,6 +1,8 @@
-from django.forms import ModelForm
+from django.core.files.uploadedfile import UploadedFile
+from django.forms import ModelForm, ValidationError
 
-from posts.models import Post, Comment, Follow
+from posts.images import UnsupportedImageFormat, normalize_image
+from posts.models import Group, Post, Comment, Follow
 
 
 class PostForm(ModelForm):
@@ -11,6 +13,24 @@ class PostForm(ModelForm):
                       'text': 'Введите текст поста'}
         fields = ('group', 'text', 'image')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['group'].queryset = Group.objects.filter(
+            is_deleted=False
+        )
+
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        if not isinstance(image, UploadedFile):
+            return image
+        try:
+            return normalize_image(image, force=True) or image
+        except UnsupportedImageFormat as error:
+            raise ValidationError(
+                f'Формат {error} не поддерживается: загрузите JPEG, PNG, '
+                'GIF или WebP.'
+            )
+
 
 class CommentForm(ModelForm):
     class Meta:
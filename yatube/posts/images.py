@@ -0,0 +1,59 @@
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+LOSSY_FORMATS = ('JPEG', 'WEBP')
+METADATA_KEYS = ('exif', 'icc_profile', 'xmp', 'photoshop', 'comment')
+
+
+class UnsupportedImageFormat(ValueError):
+    """Pillow читает формат картинки, но не умеет его записывать."""
+
+
+def needs_normalization(image):
+    """Проверяет по заголовку, нужно ли перекодировать картинку."""
+    max_width, max_height = settings.POST_IMAGE_MAX_SIZE
+    width, height = image.size
+    return (
+        width > max_width
+        or height > max_height
+        or any(key in image.info for key in METADATA_KEYS)
+    )
+
+
+def normalize_image(file, force=False):
+    """
+    Уменьшает картинку до POST_IMAGE_MAX_SIZE и удаляет метаданные.
+
+    Возвращает ContentFile с тем же именем или None, если картинку
+    трогать не нужно: анимации и уже нормализованные файлы остаются
+    как есть. Форматы, которые Pillow только читает (XPM, PSD, CUR...),
+    вызывают UnsupportedImageFormat.
+    """
+    file.seek(0)
+    image = Image.open(file)
+    if getattr(image, 'is_animated', False):
+        return None
+    if not force and not needs_normalization(image):
+        return None
+    image_format = image.format
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail(settings.POST_IMAGE_MAX_SIZE, Image.LANCZOS)
+    for key in METADATA_KEYS:
+        image.info.pop(key, None)
+
+    options = {'optimize': True}
+    if image_format in LOSSY_FORMATS:
+        options['quality'] = settings.POST_IMAGE_QUALITY
+    if image_format == 'JPEG':
+        options['progressive'] = True
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+    buffer = BytesIO()
+    try:
+        image.save(buffer, format=image_format, **options)
+    except (KeyError, OSError) as error:
+        raise UnsupportedImageFormat(image_format) from error
+    return ContentFile(buffer.getvalue(), name=file.name)
@@ -0,0 +1,204 @@
+import json
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment, Follow, Group, Post, User
+from .tags import index_posts
+from .threads import ancestor_ids, locate
+
+
+@contextmanager
+def preserve_dates(*fields):
+    """
+    Временно отключает auto_now_add, чтобы сохранить исходные даты.
+
+    Флаг меняется у поля модели, то есть для всего процесса, поэтому
+    контекст годится только для отдельной команды вроде импорта.
+    """
+    saved = [field.auto_now_add for field in fields]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, value in zip(fields, saved):
+            field.auto_now_add = value
+
+
+def parse_moment(value):
+    moment = parse_datetime(value) if value else None
+    if moment is None:
+        return timezone.now()
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class Importer:
+    """
+    Пишет пачки записей выгрузки в базу через bulk_create.
+
+    Авторы и группы разрешаются через словари в памяти, которые
+    дополняются одним запросом на пачку. Исходные id сохраняются, а
+    конфликты игнорируются, поэтому повтор пачки после сбоя безопасен.
+    """
+
+    def __init__(self):
+        self.users = {}
+        self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.stats = {'post': 0, 'comment': 0, 'follow': 0, 'skipped': 0}
+
+    def resolve_users(self, usernames):
+        missing = set(usernames) - self.users.keys()
+        if not missing:
+            return
+        self.users.update(
+            User.objects.filter(username__in=missing)
+            .values_list('username', 'pk')
+        )
+        missing -= self.users.keys()
+        if missing:
+            password = make_password(None)
+            User.objects.bulk_create(
+                [User(username=name, password=password) for name in missing],
+                ignore_conflicts=True,
+            )
+            self.users.update(
+                User.objects.filter(username__in=missing)
+                .values_list('username', 'pk')
+            )
+
+    def resolve_groups(self, slugs):
+        missing = {slug for slug in slugs if slug} - self.groups.keys()
+        if not missing:
+            return
+        Group.objects.bulk_create(
+            [Group(title=slug, slug=slug, description='') for slug in missing],
+            ignore_conflicts=True,
+        )
+        self.groups.update(
+            Group.objects.filter(slug__in=missing).values_list('slug', 'pk')
+        )
+
+    def import_chunk(self, records):
+        by_type = {'post': [], 'comment': [], 'follow': []}
+        for record in records:
+            if record.get('type') in by_type:
+                by_type[record['type']].append(record)
+            else:
+                self.stats['skipped'] += 1
+        self.resolve_users(
+            [record['author'] for record in records if record.get('author')]
+            + [record['user'] for record in by_type['follow']]
+        )
+        self.resolve_groups(record.get('group') for record in by_type['post'])
+        with transaction.atomic():
+            self.import_posts(by_type['post'])
+            self.import_comments(by_type['comment'])
+            self.import_follows(by_type['follow'])
+
+    def import_posts(self, records):
+        posts = [
+            Post(
+                pk=record['id'],
+                text=record['text'],
+                pub_date=parse_moment(record.get('pub_date')),
+                author_id=self.users[record['author']],
+                group_id=self.groups.get(record.get('group')),
+                image=record.get('image') or '',
+            )
+            for record in records
+        ]
+        Post.objects.bulk_create(posts, ignore_conflicts=True)
+        index_posts(posts)
+        self.stats['post'] += len(posts)
+
+    def import_comments(self, records):
+        """
+        Вставляет комментарии, заново строя их пути и глубину.
+
+        Выгрузка идёт по возрастанию id, поэтому родитель приходит раньше
+        ответа: его путь берётся из базы или из этой же пачки. Ответ на
+        неизвестный комментарий становится корнем. Уже импортированные
+        записи пропускаются, чтобы повтор пачки не завышал счётчики
+        ответов у предков.
+        """
+        total = len(records)
+        existing = set(Post.objects.filter(
+            pk__in={record['post'] for record in records}
+        ).values_list('pk', flat=True))
+        records = sorted(
+            (record for record in records if record['post'] in existing),
+            key=lambda record: record['id'],
+        )
+        imported = set(Comment.objects.filter(
+            pk__in=[record['id'] for record in records]
+        ).values_list('pk', flat=True))
+        paths = dict(Comment.objects.filter(
+            pk__in={record.get('parent') for record in records} - {None}
+        ).values_list('pk', 'path'))
+        comments = []
+        replies = Counter()
+        for record in records:
+            if record['id'] in imported:
+                continue
+            parent_id, path, depth = locate(
+                paths.get(record.get('parent'), ''), record['id']
+            )
+            paths[record['id']] = path
+            replies.update(ancestor_ids(path)[:-1])
+            comments.append(Comment(
+                pk=record['id'],
+                post_id=record['post'],
+                author_id=self.users[record['author']],
+                text=record['text'],
+                created=parse_moment(record.get('created')),
+                parent_id=parent_id,
+                path=path,
+                depth=depth,
+            ))
+        Comment.objects.bulk_create(comments, ignore_conflicts=True)
+        by_count = defaultdict(list)
+        for pk, count in replies.items():
+            by_count[count].append(pk)
+        for count, pks in by_count.items():
+            Comment.objects.filter(pk__in=pks).update(
+                reply_count=F('reply_count') + count
+            )
+        self.stats['comment'] += len(records)
+        self.stats['skipped'] += total - len(records)
+
+    def import_follows(self, records):
+        follows = [
+            Follow(
+                user_id=self.users[record['user']],
+                author_id=self.users[record['author']],
+            )
+            for record in records
+            if record['user'] != record['author']
+        ]
+        Follow.objects.bulk_create(follows, ignore_conflicts=True)
+        self.stats['follow'] += len(follows)
+        self.stats['skipped'] += len(records) - len(follows)
+
+
+def read_chunks(stream, chunk_size):
+    """Читает NDJSON пачками, отдавая вместе с пачкой смещение после неё."""
+    chunk = []
+    while True:
+        line = stream.readline()
+        if not line:
+            break
+        if line.strip():
+            chunk.append(json.loads(line))
+        if len(chunk) >= chunk_size:
+            yield chunk, stream.tell()
+            chunk = []
+    if chunk:
+        yield chunk, stream.tell()
@@ -0,0 +1,96 @@
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q, Sum
+
+from .models import Like, LikeCount
+
+SHARDS = 8
+
+
+def shard_of(user_id):
+    """
+    Часть счётчика, в которую пишет пользователь.
+
+    Лайки одного поста от разных людей обновляют разные строки и не ждут
+    друг друга; отмена лайка попадает в ту же часть, что и сам лайк.
+    """
+    return user_id % SHARDS
+
+
+def add_to_counter(post_id, shard, delta):
+    counter = LikeCount.objects.filter(post_id=post_id, shard=shard)
+    if counter.update(count=F('count') + delta):
+        return
+    LikeCount.objects.bulk_create(
+        [LikeCount(post_id=post_id, shard=shard)], ignore_conflicts=True
+    )
+    counter.update(count=F('count') + delta)
+
+
+def like(user, post_id):
+    """Ставит лайк; возвращает False, если он уже стоял."""
+    try:
+        with transaction.atomic():
+            Like.objects.create(user=user, post_id=post_id)
+            add_to_counter(post_id, shard_of(user.pk), 1)
+    except IntegrityError:
+        return False
+    return True
+
+
+def unlike(user, post_id):
+    """Снимает лайк; возвращает False, если его не было."""
+    with transaction.atomic():
+        deleted, _ = Like.objects.filter(user=user, post_id=post_id).delete()
+        if deleted:
+            add_to_counter(post_id, shard_of(user.pk), -1)
+    return bool(deleted)
+
+
+def delete_likes(pks):
+    """
+    Удаляет пачку лайков и вычитает их из счётчиков.
+
+    Так вычищаются лайки удалённого пользователя: каскад DELETE счётчики
+    не трогает. Части с одинаковой убылью обновляются одним UPDATE.
+    Строки лайков блокируются до удаления, поэтому одновременная отмена
+    лайка не вычтется дважды.
+    """
+    with transaction.atomic():
+        rows = Like.objects.filter(pk__in=pks)
+        removed = Counter(
+            (post_id, shard_of(user_id))
+            for post_id, user_id in rows.select_for_update().values_list(
+                'post_id', 'user_id'
+            )
+        )
+        rows.delete()
+        by_delta = defaultdict(list)
+        for counter, delta in removed.items():
+            by_delta[delta].append(counter)
+        for delta, counters in by_delta.items():
+            condition = Q()
+            for post_id, shard in counters:
+                condition |= Q(post_id=post_id, shard=shard)
+            LikeCount.objects.filter(condition).update(
+                count=F('count') - delta
+            )
+
+
+def like_counts(post_ids):
+    """{post_id: лайков} для пачки постов одним агрегатным запросом."""
+    return dict(LikeCount.objects.filter(
+        post_id__in=post_ids
+    ).order_by().values('post_id').annotate(
+        total=Sum('count')
+    ).values_list('post_id', 'total'))
+
+
+def liked_ids(user, post_ids):
+    """Какие из постов пользователь лайкнул — один запрос на пачку."""
+    if not user.is_authenticated:
+        return set()
+    return set(Like.objects.filter(
+        user=user, post_id__in=post_ids
+    ).values_list('post_id', flat=True))
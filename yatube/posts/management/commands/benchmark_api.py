@@ -0,0 +1,75 @@
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+
+POSTS = 1000
+REQUESTS = 50
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время ответа и объём HTML-лент и JSON API. '
+        'Тестовые данные создаются в транзакции и откатываются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=POSTS)
+        parser.add_argument('--requests', type=int, default=REQUESTS)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            author, group = self.fill(options['posts'])
+            pairs = (
+                ('index', reverse('posts:index'),
+                 reverse('posts:api_index')),
+                ('group', reverse('posts:group_list', args=[group.slug]),
+                 reverse('posts:api_group_list', args=[group.slug])),
+                ('profile', reverse('posts:profile', args=[author.username]),
+                 reverse('posts:api_profile', args=[author.username])),
+            )
+            # Адрес вне INTERNAL_IPS, чтобы не мерить debug_toolbar.
+            client = Client(REMOTE_ADDR='192.0.2.1')
+            for title, html_url, api_url in pairs:
+                variants = (
+                    ('html', html_url),
+                    ('json', api_url),
+                    ('json+fields', api_url + '?fields=id,text'),
+                )
+                for kind, url in variants:
+                    median, size = self.measure(
+                        client, url, options['requests']
+                    )
+                    self.stdout.write(
+                        f'{title:8} {kind:12} {median:8.2f} мс '
+                        f'{size / 1024:8.1f} КБ'
+                    )
+            transaction.set_rollback(True)
+
+    def fill(self, count):
+        author = User.objects.create_user(username='benchmark_author')
+        group = Group.objects.create(
+            title='Benchmark', slug='benchmark-group', description='-'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Тестовый пост {i} ' * 20, author=author, group=group)
+            for i in range(count)
+        )
+        return author, group
+
+    def measure(self, client, url, requests):
+        timings = []
+        size = 0
+        for _ in range(requests):
+            cache.clear()
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+            size = len(response.content)
+        return statistics.median(timings), size
@@ -0,0 +1,113 @@
+import random
+import sqlite3
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.search import build_match
+
+ROWS = 1_000_000
+QUERIES = 50
+VOCABULARY = 20_000
+WORDS_PER_POST = 40
+PAGE_SIZE = 10
+INSERT_SQL = 'INSERT INTO posts_post VALUES (?, ?, ?)'
+
+
+def make_vocabulary(size, rng):
+    letters = 'абвгдежзиклмнопрстуфхцчшэюя'
+    return [
+        ''.join(rng.choice(letters) for _ in range(rng.randint(3, 10)))
+        for _ in range(size)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает LIKE и FTS5 на синтетической таблице постов в памяти. '
+        'Рабочая база не затрагивается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=ROWS)
+        parser.add_argument('--queries', type=int, default=QUERIES)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        words = make_vocabulary(VOCABULARY, rng)
+        db = sqlite3.connect(':memory:')
+        self.fill(db, words, rng, options['rows'])
+
+        terms = rng.sample(words, options['queries'])
+        like = self.measure(db, terms, self.like_query)
+        fts = self.measure(db, terms, self.fts_query)
+        self.stdout.write(f'Строк: {options["rows"]}, запросов: {len(terms)}')
+        for title, timings in (('LIKE', like), ('FTS5', fts)):
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            self.stdout.write(
+                f'{title:5} медиана {statistics.median(timings):8.2f} мс, '
+                f'p95 {p95:8.2f} мс'
+            )
+
+    def fill(self, db, words, rng, rows):
+        started = time.perf_counter()
+        db.execute(
+            'CREATE TABLE posts_post ('
+            'id INTEGER PRIMARY KEY, text TEXT, pub_date INTEGER)'
+        )
+        db.execute('CREATE INDEX posts_post_pub_date ON posts_post(pub_date)')
+        batch = []
+        for pk in range(1, rows + 1):
+            text = ' '.join(rng.choices(words, k=WORDS_PER_POST))
+            batch.append((pk, text, pk))
+            if len(batch) == 10_000:
+                db.executemany(INSERT_SQL, batch)
+                batch = []
+        db.executemany(INSERT_SQL, batch)
+        db.execute(
+            "CREATE VIRTUAL TABLE posts_post_fts USING fts5(text, "
+            "content='posts_post', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        db.execute(
+            "INSERT INTO posts_post_fts(posts_post_fts) VALUES ('rebuild')"
+        )
+        db.commit()
+        self.stdout.write(
+            f'Таблица заполнена за {time.perf_counter() - started:.1f} с'
+        )
+
+    def like_query(self, db, term):
+        db.execute(
+            'SELECT COUNT(*) FROM posts_post WHERE text LIKE ?',
+            (f'%{term}%',),
+        ).fetchone()
+        return db.execute(
+            'SELECT id FROM posts_post WHERE text LIKE ? '
+            'ORDER BY pub_date DESC LIMIT ?',
+            (f'%{term}%', PAGE_SIZE),
+        ).fetchall()
+
+    def fts_query(self, db, term):
+        match = build_match(term)
+        db.execute(
+            'SELECT COUNT(*) FROM posts_post_fts WHERE posts_post_fts MATCH ?',
+            (match,),
+        ).fetchone()
+        return db.execute(
+            'SELECT p.id FROM posts_post_fts f '
+            'JOIN posts_post p ON p.id = f.rowid '
+            'WHERE posts_post_fts MATCH ? ORDER BY f.rank LIMIT ?',
+            (match, PAGE_SIZE),
+        ).fetchall()
+
+    def measure(self, db, terms, query):
+        timings = []
+        for term in terms:
+            started = time.perf_counter()
+            query(db, term)
+            timings.append((time.perf_counter() - started) * 1000)
+        return timings
@@ -0,0 +1,167 @@
+import os
+import shutil
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from sorl.thumbnail import default, delete
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore
+
+from posts.models import Post
+
+BATCH_SIZE = 1000
+MIN_AGE = 60 * 60
+
+
+def iter_files(root, exclude=()):
+    """Лениво обходит дерево каталогов, пропуская каталоги из exclude."""
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        with os.scandir(current) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.path not in exclude:
+                        stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    yield entry
+
+
+def is_inside(path, root):
+    path = os.path.abspath(path)
+    return os.path.commonpath([path, root]) == root
+
+
+def iter_batches(entries, size):
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из каталога загрузок постов картинки, на которые не '
+        'ссылается ни один пост, и миниатюры sorl-thumbnail, потерявшие '
+        'исходник. Остальные файлы MEDIA_ROOT не трогаются.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, что будет удалено.',
+        )
+        parser.add_argument(
+            '--quarantine', metavar='DIR',
+            help='Переносить файлы в каталог вместо удаления.',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='Сколько файлов проверять одним запросом.',
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=MIN_AGE,
+            help='Не трогать файлы моложе указанного числа секунд.',
+        )
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.quarantine = options['quarantine']
+        self.verbosity = options['verbosity']
+        self.deadline = time.time() - options['min_age']
+        batch_size = options['batch_size']
+
+        media_root = os.path.abspath(settings.MEDIA_ROOT)
+        upload_root = os.path.join(
+            media_root, Post._meta.get_field('image').upload_to.strip('/')
+        )
+        thumbnail_root = os.path.join(
+            media_root, thumbnail_settings.THUMBNAIL_PREFIX.strip('/')
+        )
+        # Перенесённые файлы сохраняют mtime, и карантин внутри MEDIA_ROOT
+        # следующий запуск без --quarantine удалил бы насовсем.
+        if self.quarantine and is_inside(self.quarantine, media_root):
+            raise CommandError('Карантин не может лежать внутри MEDIA_ROOT.')
+
+        self.removed = self.freed = 0
+        checked = 0
+        if os.path.isdir(upload_root):
+            files = iter_files(upload_root, exclude={thumbnail_root})
+            for batch in iter_batches(files, batch_size):
+                checked += len(batch)
+                self.clean_originals(media_root, batch)
+        if os.path.isdir(thumbnail_root):
+            for batch in iter_batches(iter_files(thumbnail_root), batch_size):
+                checked += len(batch)
+                self.clean_thumbnails(media_root, batch)
+
+        action = 'Будет удалено' if self.dry_run else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено файлов: {checked}. {action}: {self.removed} '
+            f'({self.freed / 1024 / 1024:.1f} МБ).'
+        ))
+
+    def is_candidate(self, entry):
+        return entry.stat(follow_symlinks=False).st_mtime < self.deadline
+
+    def clean_originals(self, media_root, batch):
+        names = {
+            os.path.relpath(entry.path, media_root).replace(os.sep, '/'): entry
+            for entry in batch if self.is_candidate(entry)
+        }
+        referenced = set(
+            Post.objects.filter(image__in=names).values_list(
+                'image', flat=True
+            )
+        )
+        for name, entry in names.items():
+            if name in referenced:
+                continue
+            self.report(name, entry)
+            if self.dry_run:
+                continue
+            if self.quarantine:
+                default.kvstore.delete(ImageFile(name))
+                self.move(media_root, name)
+            else:
+                delete(name)
+
+    def clean_thumbnails(self, media_root, batch):
+        keys = {}
+        for entry in batch:
+            if not self.is_candidate(entry):
+                continue
+            name = os.path.relpath(entry.path, media_root).replace(os.sep, '/')
+            image_file = ImageFile(name, default.storage)
+            keys[add_prefix(image_file.key)] = (name, entry)
+        known = set(
+            KVStore.objects.filter(key__in=keys).values_list('key', flat=True)
+        )
+        for key, (name, entry) in keys.items():
+            if key in known:
+                continue
+            self.report(name, entry)
+            if self.dry_run:
+                continue
+            if self.quarantine:
+                self.move(media_root, name)
+            else:
+                os.remove(entry.path)
+
+    def report(self, name, entry):
+        self.removed += 1
+        self.freed += entry.stat(follow_symlinks=False).st_size
+        if self.verbosity > 1:
+            self.stdout.write(name)
+
+    def move(self, media_root, name):
+        target = os.path.join(self.quarantine, name)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(os.path.join(media_root, name), target)
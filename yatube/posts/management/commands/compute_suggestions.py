@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from posts.recommendations import BATCH_USERS, TOP_K, compute_suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации «на кого подписаться» по общим '
+        'подпискам. Запускается периодически или ставится в очередь '
+        'задачей refresh_suggestions.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=TOP_K)
+        parser.add_argument('--batch-users', type=int, default=BATCH_USERS)
+
+    def handle(self, *args, **options):
+        users = compute_suggestions(options['top'], options['batch_users'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Рекомендации получили пользователей: {users}.'
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from posts.trending import TOP_SIZE, compute_trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает популярные посты. Запускается периодически, '
+        'например из cron, или ставится в очередь задачей refresh_trending.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=TOP_SIZE)
+
+    def handle(self, *args, **options):
+        count = compute_trending(options['top'])
+        self.stdout.write(self.style.SUCCESS(
+            f'В топе постов: {count}.'
+        ))
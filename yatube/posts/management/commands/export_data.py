@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import exports
+
+
+class Command(BaseCommand):
+    help = 'Потоково выгружает посты, комментарии или подписки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=list(exports.EXPORTS))
+        parser.add_argument(
+            '--format', default='ndjson', choices=list(exports.FORMATS),
+        )
+        parser.add_argument('--since', help='Начало периода, ISO-дата.')
+        parser.add_argument('--until', help='Конец периода, не включая.')
+        parser.add_argument('--group', help='Slug группы.')
+        parser.add_argument(
+            '--output', help='Файл для записи; по умолчанию stdout.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=exports.CHUNK_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        kind = options['kind']
+        try:
+            rows = exports.export_rows(
+                kind,
+                since=exports.parse_moment(options['since']),
+                until=exports.parse_moment(options['until']),
+                group=options['group'],
+                chunk_size=options['chunk_size'],
+            )
+            content = exports.render(kind, rows, options['format'])
+        except exports.ExportError as error:
+            raise CommandError(error)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8',
+                      newline='') as output:
+                output.writelines(content)
+        else:
+            for chunk in content:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts.follow_feed import reset_stats, stats
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания и промахи кеша ленты подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Обнулить счётчики после вывода.',
+        )
+
+    def handle(self, *args, **options):
+        values = stats()
+        total = values['hits'] + values['misses']
+        ratio = values['hits'] / total if total else 0
+        self.stdout.write(
+            f'Попаданий: {values["hits"]}, промахов: {values["misses"]}, '
+            f'доля попаданий: {ratio:.1%}.'
+        )
+        if options['reset']:
+            reset_stats()
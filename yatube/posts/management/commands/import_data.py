@@ -0,0 +1,67 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.imports import Importer, preserve_dates, read_chunks
+from posts.models import Comment, Post
+
+CHUNK_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты, комментарии и подписки из NDJSON в формате '
+        'export_data, сохраняя исходные id и даты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл NDJSON.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл с позицией во входе; по умолчанию <path>.checkpoint.',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Игнорировать сохранённую позицию и начать сначала.',
+        )
+
+    def handle(self, *args, **options):
+        checkpoint = options['checkpoint'] or options['path'] + '.checkpoint'
+        offset = 0
+        if not options['restart'] and os.path.exists(checkpoint):
+            with open(checkpoint) as file:
+                offset = int(file.read() or 0)
+            self.stdout.write(f'Продолжаем с позиции {offset}.')
+
+        importer = Importer()
+        started = time.perf_counter()
+        total = 0
+        dates = (
+            Post._meta.get_field('pub_date'),
+            Comment._meta.get_field('created'),
+        )
+        with open(options['path'], 'rb') as stream, preserve_dates(*dates):
+            stream.seek(offset)
+            for chunk, position in read_chunks(stream, options['chunk_size']):
+                importer.import_chunk(chunk)
+                self.save_checkpoint(checkpoint, position)
+                total += len(chunk)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'Обработано записей: {total} '
+                    f'({total / elapsed:.0f} в секунду)'
+                )
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        stats = ', '.join(
+            f'{name}: {count}' for name, count in importer.stats.items()
+        )
+        self.stdout.write(self.style.SUCCESS(f'Импорт завершён. {stats}'))
+
+    def save_checkpoint(self, checkpoint, position):
+        temporary = checkpoint + '.tmp'
+        with open(temporary, 'w') as file:
+            file.write(str(position))
+        os.replace(temporary, checkpoint)
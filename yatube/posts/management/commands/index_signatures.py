@@ -0,0 +1,65 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.duplicates import find_duplicate, index_signatures
+from posts.models import Post
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит подписи MinHash для поиска похожих постов. С --flag '
+        'заодно помечает посты, похожие на более ранние.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--flag',
+            action='store_true',
+            help='Помечать похожие посты: по два запроса на пост.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.only(
+            'pk', 'text', 'pub_date', 'author_id'
+        ).order_by('pk')
+        last_pk = 0
+        indexed = 0
+        flagged = 0
+        while True:
+            batch = list(
+                posts.filter(pk__gt=last_pk)[:options['batch_size']]
+            )
+            if not batch:
+                break
+            with transaction.atomic():
+                if options['flag']:
+                    flagged += self.flag_batch(batch)
+                else:
+                    index_signatures(batch)
+            last_pk = batch[-1].pk
+            indexed += len(batch)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Обработано постов: {indexed}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, обработано постов: {indexed}, похожих: {flagged}.'
+        ))
+
+    def flag_batch(self, batch):
+        """
+        Подписи пишутся по одной, чтобы пост сравнивался и с более
+        ранними постами той же пачки.
+        """
+        flagged = 0
+        for post in batch:
+            duplicate = find_duplicate(
+                post.text, post.author_id, exclude=post.pk,
+                before=post.pub_date,
+            )
+            if duplicate and duplicate.post_id > post.pk:
+                duplicate = None
+            flagged += duplicate is not None
+            index_signatures([post], {post.pk: duplicate})
+        return flagged
@@ -0,0 +1,81 @@
+from django.core.management.base import BaseCommand
+from PIL import UnidentifiedImageError
+from sorl.thumbnail import delete
+
+from posts.images import UnsupportedImageFormat, normalize_image
+from posts.models import Post
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        'Уменьшает и очищает от метаданных картинки уже опубликованных '
+        'постов, сбрасывая их устаревшие миниатюры.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, какие картинки будут перекодированы.',
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Перекодировать даже уже нормализованные картинки.',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').order_by('pk')
+        last_pk = 0
+        checked = changed = saved = 0
+        while True:
+            batch = list(
+                posts.filter(pk__gt=last_pk)
+                .values_list('pk', 'image')[:options['batch_size']]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            for pk, name in batch:
+                checked += 1
+                result = self.normalize(pk, name, options)
+                if result is not None:
+                    changed += 1
+                    saved += result
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено картинок: {checked}, перекодировано: {changed}, '
+            f'освобождено {saved / 1024 / 1024:.1f} МБ.'
+        ))
+
+    def normalize(self, pk, name, options):
+        field = Post._meta.get_field('image')
+        storage = field.storage
+        if not storage.exists(name):
+            self.stderr.write(f'Пост {pk}: файл {name} не найден.')
+            return None
+        with storage.open(name) as file:
+            before = file.size
+            try:
+                content = normalize_image(file, force=options['force'])
+            except UnsupportedImageFormat as error:
+                self.stderr.write(
+                    f'Пост {pk}: {name}: формат {error} не перекодируется.'
+                )
+                return None
+            except (UnidentifiedImageError, OSError) as error:
+                self.stderr.write(f'Пост {pk}: {name}: {error}')
+                return None
+        if content is None:
+            return None
+        if options['verbosity'] > 1:
+            self.stdout.write(name)
+        if options['dry_run']:
+            return before - content.size
+        # Сначала новый файл и ссылка на него, и только потом удаление
+        # старого: сбой на любом шаге не оставляет пост без картинки.
+        new_name = storage.save(name, content)
+        Post.objects.filter(image=name).update(image=new_name)
+        delete(name, delete_file=False)
+        storage.delete(name)
+        return before - content.size
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Post
+from posts.tags import index_posts
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает индекс тегов и упоминаний для всех постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        posts = Post.objects.only('pk', 'text', 'pub_date').order_by('pk')
+        last_pk = 0
+        indexed = 0
+        while True:
+            batch = list(
+                posts.filter(pk__gt=last_pk)[:options['batch_size']]
+            )
+            if not batch:
+                break
+            with transaction.atomic():
+                index_posts(batch)
+            last_pk = batch[-1].pk
+            indexed += len(batch)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Проиндексировано постов: {indexed}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово, проиндексировано постов: {indexed}.'
+        ))
@@ -0,0 +1,66 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0008_follow_suggestions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSignature',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('minhash', models.BinaryField(verbose_name='MinHash текста')),
+                ('band0', models.PositiveIntegerField(verbose_name='Полоса 0')),
+                ('band1', models.PositiveIntegerField(verbose_name='Полоса 1')),
+                ('band2', models.PositiveIntegerField(verbose_name='Полоса 2')),
+                ('band3', models.PositiveIntegerField(verbose_name='Полоса 3')),
+                ('band4', models.PositiveIntegerField(verbose_name='Полоса 4')),
+                ('band5', models.PositiveIntegerField(verbose_name='Полоса 5')),
+                ('band6', models.PositiveIntegerField(verbose_name='Полоса 6')),
+                ('band7', models.PositiveIntegerField(verbose_name='Полоса 7')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации поста')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('duplicate_of', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Post', verbose_name='Похож на пост')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='postsignature',
+            index=models.Index(fields=['band0', 'pub_date'], name='post_signature_band0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postsignature',
+            index=models.Index(fields=['band1', 'pub_date'], name='post_signature_band1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postsignature',
+            index=models.Index(fields=['band2', 'pub_date'], name='post_signature_band2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postsignature',
+            index=models.Index(fields=['band3', 'pub_date'], name='post_signature_band3_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postsignature',
+            index=models.Index(fields=['band4', 'pub_date'], name='post_signature_band4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postsignature',
+            index=models.Index(fields=['band5', 'pub_date'], name='post_signature_band5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postsignature',
+            index=models.Index(fields=['band6', 'pub_date'], name='post_signature_band6_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postsignature',
+            index=models.Index(fields=['band7', 'pub_date'], name='post_signature_band7_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0009_post_signatures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='group',
+            name='is_deleted',
+            field=models.BooleanField(default=False, verbose_name='Удалена'),
+        ),
+    ]
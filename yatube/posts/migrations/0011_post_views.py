@@ -0,0 +1,20 @@
+# Generated by Django 2.2.16 on 2026-10-19 12:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_group_tombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='views',
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name='Просмотры'
+            ),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0011_post_views'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadNotifications',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='unread_notifications', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Получатель')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Непрочитанных сводок')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(verbose_name='Начало интервала')),
+                ('posts', models.PositiveIntegerField(default=0, verbose_name='Новых записей')),
+                ('is_read', models.BooleanField(default=False, verbose_name='Прочитано')),
+                ('latest_post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='posts.Post', verbose_name='Последняя запись')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL, verbose_name='Получатель')),
+            ],
+            options={
+                'ordering': ['-bucket'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(fields=('user', 'bucket'), name='unique_notification_bucket'),
+        ),
+    ]
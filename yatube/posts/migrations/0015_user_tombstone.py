@@ -0,0 +1,39 @@
+# Generated by Django 2.2.16 on 2026-10-19 11:06
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import json
+
+
+def backfill_tombstones(apps, schema_editor):
+    """Пользователи, чья вычистка ещё в очереди, получают пометку."""
+    Task = apps.get_model('tasks', 'Task')
+    UserTombstone = apps.get_model('posts', 'UserTombstone')
+    payloads = Task.objects.filter(
+        name='posts.deletion.reap', status__in=['pending', 'running']
+    ).values_list('payload', flat=True)
+    for payload in payloads:
+        label, pk = json.loads(payload)['args']
+        if label == settings.AUTH_USER_MODEL:
+            UserTombstone.objects.get_or_create(user_id=pk)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0014_likes'),
+        ('tasks', '0003_task_heartbeat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTombstone',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='tombstone', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('deleted', models.DateTimeField(auto_now_add=True, verbose_name='Дата удаления')),
+            ],
+        ),
+        migrations.RunPython(backfill_tombstones, migrations.RunPython.noop),
+    ]
@@ -9,11 +9,39 @@ class Group(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    is_deleted = models.BooleanField('Удалена', default=False)
 
     def __str__(self):
         return self.title
 
 
+class UserTombstone(models.Model):
+    """
+    Пометка удалённого пользователя, чьи строки ещё ждут вычистки.
+
+    Встроенного User не расширить полем, поэтому флаг — отдельная строка:
+    пока она есть, контент и профиль пользователя скрыты. Простая
+    деактивация (is_active=False) ничего не прячет.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='tombstone',
+        verbose_name='Пользователь',
+    )
+    deleted = models.DateTimeField('Дата удаления', auto_now_add=True)
+
+
+class PostQuerySet(models.QuerySet):
+    def visible(self):
+        """Без постов удалённых авторов, которые ещё ждут вычистки."""
+        return self.filter(author__tombstone__isnull=True)
+
+    def for_feed(self):
+        return self.visible().select_related('author', 'group')
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name='Текст поста',
@@ -42,6 +70,13 @@ class Post(models.Model):
         upload_to='posts/',
         blank=True
     )
+    views = models.PositiveIntegerField(
+        'Просмотры',
+        default=0,
+        editable=False,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:LEN_TEXT]
@@ -49,6 +84,14 @@ class Post(models.Model):
     class Meta():
         ordering = ['-pub_date']
         default_related_name = 'posts'
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='post_author_feed_idx'),
+            models.Index(
+                fields=['group', '-pub_date'],
+                name='post_group_feed_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -71,10 +114,43 @@ class Comment(models.Model):
     created = models.DateTimeField(
         auto_now_add=True
     )
+    # Ответы переживают удаление родителя, поэтому ключ без ограничения
+    # в базе; ветки удаляются через threads.delete_subtrees().
+    parent = models.ForeignKey(
+        'self',
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='replies',
+        verbose_name='Ответ на',
+    )
+    path = models.CharField(
+        'Путь в ветке',
+        max_length=255,
+        blank=True,
+        editable=False,
+    )
+    depth = models.PositiveSmallIntegerField(
+        'Глубина', default=0, editable=False
+    )
+    reply_count = models.PositiveIntegerField(
+        'Ответов в ветке', default=0, editable=False
+    )
 
     def __str__(self):
         return self.text[:LEN_TEXT]
 
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['post', '-created'],
+                name='comment_post_idx'),
+            models.Index(
+                fields=['post', 'path'],
+                name='comment_thread_idx'),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -87,9 +163,238 @@ class Follow(models.Model):
         related_name="following",
         verbose_name="Автор",
     )
+    created = models.DateTimeField(
+        'Дата подписки',
+        auto_now_add=True,
+        null=True,
+        db_index=True,
+    )
 
     class Meta:
         constraints = [
             models.UniqueConstraint(
                 fields=['user', 'author'],
                 name='unique_follower')]
+
+
+class Tag(models.Model):
+    name = models.CharField('Тег', max_length=100, unique=True)
+
+    def __str__(self):
+        return f'#{self.name}'
+
+
+class PostTag(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+        verbose_name='Пост',
+    )
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='post_links',
+        verbose_name='Тег',
+    )
+    pub_date = models.DateTimeField('Дата публикации поста')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'tag'],
+                name='unique_post_tag')]
+        indexes = [
+            models.Index(
+                fields=['tag', '-pub_date', '-post'],
+                name='post_tag_feed_idx')]
+
+
+class Mention(models.Model):
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Пост',
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Упомянутый пользователь',
+    )
+    pub_date = models.DateTimeField('Дата публикации поста')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'user'],
+                name='unique_post_mention')]
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='mention_feed_idx')]
+
+
+class TrendingPost(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='trending',
+        verbose_name='Пост',
+    )
+    rank = models.PositiveIntegerField('Место', unique=True)
+    score = models.FloatField('Рейтинг')
+    computed = models.DateTimeField('Рассчитан')
+
+    class Meta:
+        ordering = ['rank']
+
+
+class FollowSuggestion(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='follow_suggestions',
+        verbose_name='Кому',
+        help_text='Пусто — общие рекомендации для новых пользователей',
+    )
+    suggested = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рекомендуемый автор',
+    )
+    score = models.PositiveIntegerField('Общих подписок')
+    rank = models.PositiveSmallIntegerField('Место')
+
+    class Meta:
+        ordering = ['rank']
+        indexes = [
+            models.Index(
+                fields=['user', 'rank'],
+                name='follow_suggestion_idx')]
+
+
+class PostSignature(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='signature',
+        verbose_name='Пост',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    minhash = models.BinaryField('MinHash текста')
+    band0 = models.PositiveIntegerField('Полоса 0')
+    band1 = models.PositiveIntegerField('Полоса 1')
+    band2 = models.PositiveIntegerField('Полоса 2')
+    band3 = models.PositiveIntegerField('Полоса 3')
+    band4 = models.PositiveIntegerField('Полоса 4')
+    band5 = models.PositiveIntegerField('Полоса 5')
+    band6 = models.PositiveIntegerField('Полоса 6')
+    band7 = models.PositiveIntegerField('Полоса 7')
+    pub_date = models.DateTimeField('Дата публикации поста')
+    duplicate_of = models.ForeignKey(
+        Post,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Похож на пост',
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=[f'band{i}', 'pub_date'],
+                         name=f'post_signature_band{i}_idx')
+            for i in range(8)
+        ]
+
+
+class Notification(models.Model):
+    """Сводка о новых записях подписок за один интервал."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель',
+    )
+    bucket = models.DateTimeField('Начало интервала')
+    posts = models.PositiveIntegerField('Новых записей', default=0)
+    latest_post = models.ForeignKey(
+        Post,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Последняя запись',
+    )
+    is_read = models.BooleanField('Прочитано', default=False)
+
+    class Meta:
+        ordering = ['-bucket']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'bucket'],
+                name='unique_notification_bucket')]
+
+
+class UnreadNotifications(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='unread_notifications',
+        verbose_name='Получатель',
+    )
+    count = models.PositiveIntegerField('Непрочитанных сводок', default=0)
+
+
+class Like(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='likes',
+        verbose_name='Пользователь',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='likes',
+        verbose_name='Пост',
+    )
+    created = models.DateTimeField('Дата', auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_like')]
+
+
+class LikeCount(models.Model):
+    """Часть счётчика лайков поста; итог — сумма по всем частям."""
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='like_counts',
+        verbose_name='Пост',
+    )
+    shard = models.PositiveSmallIntegerField('Часть')
+    count = models.IntegerField('Лайков', default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['post', 'shard'],
+                name='unique_like_count_shard')]
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+
+from tasks.queue import report_progress, task
+
+from .models import Follow, Notification, Post, UnreadNotifications
+
+DIGEST_INTERVAL = timedelta(hours=1)
+CHUNK_SIZE = 500
+
+
+def bucket_of(moment):
+    """Начало интервала, в сводку которого попадает запись."""
+    offset = int(moment.timestamp()) % int(DIGEST_INTERVAL.total_seconds())
+    return moment.replace(microsecond=0) - timedelta(seconds=offset)
+
+
+def add_to_digests(post, bucket, user_ids):
+    """
+    Добавляет запись в сводки пачки подписчиков.
+
+    Сводка одна на пользователя и интервал: существующие обновляются
+    одним UPDATE, недостающие вставляются одним INSERT. Счётчик
+    непрочитанного растёт только у тех, чья сводка была новой или уже
+    прочитанной, — тоже двумя запросами на всю пачку.
+    """
+    digests = Notification.objects.filter(
+        user_id__in=user_ids, bucket=bucket
+    )
+    known = dict(digests.values_list('user_id', 'is_read'))
+    digests.exclude(latest_post=post).update(
+        posts=F('posts') + 1, latest_post=post, is_read=False
+    )
+    Notification.objects.bulk_create(
+        [
+            Notification(user_id=pk, bucket=bucket, posts=1, latest_post=post)
+            for pk in user_ids if pk not in known
+        ],
+        ignore_conflicts=True,
+    )
+    fresh = [pk for pk in user_ids if known.get(pk, True)]
+    counters = UnreadNotifications.objects.filter(user_id__in=fresh)
+    existing = set(counters.values_list('user_id', flat=True))
+    counters.update(count=F('count') + 1)
+    UnreadNotifications.objects.bulk_create(
+        [
+            UnreadNotifications(user_id=pk, count=1)
+            for pk in fresh if pk not in existing
+        ],
+        ignore_conflicts=True,
+    )
+
+
+@task(priority=-5)
+def notify_followers(post_id):
+    """
+    Разносит новую запись по сводкам подписчиков автора.
+
+    Подписчики обходятся по возрастанию id пачками по CHUNK_SIZE,
+    каждая пачка — своя транзакция. Повтор задачи не удваивает записи
+    в сводках, где эта запись уже последняя.
+    """
+    post = Post.objects.visible().filter(pk=post_id).first()
+    if post is None:
+        return
+    bucket = bucket_of(post.pub_date)
+    followers = Follow.objects.filter(
+        author_id=post.author_id, user__is_active=True
+    ).order_by('user_id').values_list('user_id', flat=True)
+    done = last = 0
+    while True:
+        chunk = list(followers.filter(user_id__gt=last)[:CHUNK_SIZE])
+        if not chunk:
+            break
+        with transaction.atomic():
+            add_to_digests(post, bucket, chunk)
+        done += len(chunk)
+        last = chunk[-1]
+        report_progress(done)
+
+
+def unread_count(user):
+    """Число непрочитанных сводок: чтение одной строки по ключу."""
+    return UnreadNotifications.objects.filter(
+        user_id=user.pk
+    ).values_list('count', flat=True).first() or 0
+
+
+def mark_read(user):
+    with transaction.atomic():
+        Notification.objects.filter(user=user, is_read=False).update(
+            is_read=True
+        )
+        UnreadNotifications.objects.filter(user_id=user.pk).update(count=0)
+
+
+def digests(user):
+    return Notification.objects.filter(user=user).select_related(
+        'latest_post__author'
+    )
@@ -1,4 +1,9 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
 
 LAST_POSTS = 10
 
@@ -7,3 +12,71 @@ def get_paginator(value, request):
     paginator = Paginator(value, LAST_POSTS)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
+
+
+class CursorPage:
+    """Страница ленты, которая знает только курсор следующей страницы."""
+
+    def __init__(self, object_list, next_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+
+def encode_cursor(date, pk):
+    raw = f'{date.isoformat()}|{pk}'.encode()
+    return urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        date, pk = urlsafe_b64decode(padded).decode().split('|')
+        return parse_datetime(date), int(pk)
+    except (DecodeError, UnicodeDecodeError, ValueError, TypeError):
+        return None
+
+
+def get_field(item, field):
+    if isinstance(item, dict):
+        return item[field]
+    return getattr(item, field)
+
+
+def get_cursor_page(queryset, request, date_field='pub_date',
+                    id_field='pk', per_page=LAST_POSTS):
+    """
+    Пагинация по ключу (date_field, id_field) вместо OFFSET.
+
+    Глубокие страницы стоят столько же, сколько первая: запрос идёт
+    по индексу от последней показанной записи.
+    """
+    queryset = queryset.order_by(f'-{date_field}', f'-{id_field}')
+    cursor = decode_cursor(request.GET.get('cursor', ''))
+    if cursor is not None and cursor[0] is not None:
+        date, pk = cursor
+        queryset = queryset.filter(
+            Q(**{f'{date_field}__lt': date})
+            | Q(**{date_field: date, f'{id_field}__lt': pk})
+        )
+    items = list(queryset[:per_page + 1])
+    next_cursor = None
+    if len(items) > per_page:
+        items = items[:per_page]
+        last = items[-1]
+        next_cursor = encode_cursor(
+            get_field(last, date_field), get_field(last, id_field)
+        )
+    return CursorPage(items, next_cursor)
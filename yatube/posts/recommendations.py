@@ -0,0 +1,119 @@
+import heapq
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Count, Max
+
+from .models import Follow, FollowSuggestion, User
+
+TOP_K = 20
+BATCH_USERS = 2000
+SHOW_SUGGESTIONS = 5
+
+# Общие подписки считаются одним агрегатным проходом по Follow:
+# f1 — мои подписки, f2 — подписки тех, на кого я подписан. Кандидаты,
+# на которых я уже подписан, и я сам отсекаются в том же запросе.
+CO_FOLLOW_SQL = '''
+    SELECT f1.user_id, f2.author_id, COUNT(*)
+    FROM {follow} f1
+    INNER JOIN {follow} f2 ON f2.user_id = f1.author_id
+    INNER JOIN {user} u ON u.id = f2.author_id AND u.is_active
+    LEFT JOIN {follow} known
+        ON known.user_id = f1.user_id AND known.author_id = f2.author_id
+    WHERE f1.user_id >= %s AND f1.user_id < %s
+        AND f2.author_id <> f1.user_id
+        AND known.id IS NULL
+    GROUP BY f1.user_id, f2.author_id
+'''
+
+
+def co_follow_counts(start, end):
+    """Возвращает {user_id: [(общих подписок, candidate_id), ...]}."""
+    sql = CO_FOLLOW_SQL.format(
+        follow=connection.ops.quote_name(Follow._meta.db_table),
+        user=connection.ops.quote_name(User._meta.db_table),
+    )
+    candidates = defaultdict(list)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [start, end])
+        for user_id, candidate_id, score in cursor:
+            candidates[user_id].append((score, -candidate_id))
+    return candidates
+
+
+def top_k(candidates, k):
+    """Лучшие k кандидатов; при равенстве — кто раньше зарегистрирован."""
+    return [
+        (-negative_id, score)
+        for score, negative_id in heapq.nlargest(k, candidates)
+    ]
+
+
+def popular_authors(k):
+    """Самые читаемые авторы — рекомендации для тех, у кого нет подписок."""
+    return list(
+        Follow.objects.filter(author__is_active=True).order_by().values(
+            'author_id'
+        ).annotate(score=Count('pk')).order_by(
+            '-score', 'author_id'
+        ).values_list('author_id', 'score')[:k]
+    )
+
+
+def compute_suggestions(top_k_size=TOP_K, batch_users=BATCH_USERS):
+    """
+    Пересчитывает рекомендации «на кого подписаться» для всех пользователей.
+
+    Подписчики обрабатываются диапазонами id: на каждый диапазон уходит
+    один агрегатный запрос и одна пачка вставок, так что память и длина
+    транзакции не зависят от размера графа. Возвращает число пользователей,
+    получивших рекомендации.
+    """
+    last = Follow.objects.aggregate(last=Max('user_id'))['last'] or 0
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user__isnull=True).delete()
+        FollowSuggestion.objects.bulk_create(
+            FollowSuggestion(suggested_id=pk, score=score, rank=rank)
+            for rank, (pk, score) in enumerate(
+                popular_authors(top_k_size), start=1
+            )
+        )
+    users = 0
+    for start in range(0, last + 1, batch_users):
+        end = start + batch_users
+        candidates = co_follow_counts(start, end)
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(
+                user_id__gte=start, user_id__lt=end
+            ).delete()
+            FollowSuggestion.objects.bulk_create(
+                FollowSuggestion(
+                    user_id=user_id, suggested_id=pk, score=score, rank=rank
+                )
+                for user_id, scored in candidates.items()
+                for rank, (pk, score) in enumerate(
+                    top_k(scored, top_k_size), start=1
+                )
+            )
+        users += len(candidates)
+    return users
+
+
+def get_suggestions(user, limit=SHOW_SUGGESTIONS):
+    """
+    Готовые рекомендации для страницы: чтение по индексу (user, rank).
+
+    Тем, кому персональных рекомендаций пока нет, показываются самые
+    читаемые авторы. Подписки, сделанные после пересчёта, отсекаются.
+    """
+    if not user.is_authenticated:
+        return []
+    suggestions = FollowSuggestion.objects.filter(
+        suggested__is_active=True
+    ).select_related('suggested').exclude(suggested=user).exclude(
+        suggested__following__user=user
+    )
+    personal = list(suggestions.filter(user=user)[:limit])
+    if personal:
+        return personal
+    return list(suggestions.filter(user__isnull=True)[:limit])
@@ -0,0 +1,78 @@
+import re
+
+from django.db import connection
+
+FTS_TABLE = 'posts_post_fts'
+WORD_RE = re.compile(r'\w+')
+
+TRIGGERS_SQL = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+)
+
+
+def search_enabled(db=connection):
+    return db.vendor == 'sqlite'
+
+
+def install_triggers(sender=None, using='default', **kwargs):
+    """
+    Создаёт триггеры, синхронизирующие индекс с таблицей постов.
+
+    SQLite пересоздаёт таблицу при изменении её схемы и теряет триггеры,
+    поэтому они ставятся после каждой миграции, а не только в первой.
+    """
+    from django.db import connections
+
+    db = connections[using]
+    if not search_enabled(db):
+        return
+    with db.cursor() as cursor:
+        if FTS_TABLE not in db.introspection.table_names(cursor):
+            return
+        for sql in TRIGGERS_SQL:
+            cursor.execute(sql)
+
+
+def build_match(query):
+    """Превращает ввод пользователя в безопасное выражение FTS5."""
+    words = WORD_RE.findall(query.lower())
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_posts(queryset, query):
+    """Фильтрует посты по тексту, лучшие совпадения — первыми."""
+    match = build_match(query)
+    if not match:
+        return queryset.none()
+    if not search_enabled():
+        return queryset.filter(text__icontains=query)
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[
+            f'{FTS_TABLE}.rowid = posts_post.id',
+            f'{FTS_TABLE} MATCH %s',
+        ],
+        params=[match],
+        select={'rank': f'{FTS_TABLE}.rank'},
+        order_by=['rank', '-pub_date'],
+    )
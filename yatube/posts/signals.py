@@ -0,0 +1,145 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import autocomplete, sitemaps, threads
+from .feeds import post_scopes
+from .models import Comment, Group, Post, User, UserTombstone
+from .versions import bump_versions
+
+pending_posts = ContextVar('pending_posts', default=None)
+
+
+@contextmanager
+def batched_invalidation():
+    """
+    Копит затронутые посты и сбрасывает их кеши одним махом на выходе.
+
+    Внутри блока обработчики post_save и post_delete у Post не делают
+    запросов, а только запоминают (pk, author_id, group_id); массовые
+    update() добавляют свои посты через remember_posts(). На выходе авторы
+    и группы разрешаются двумя запросами на всю пачку.
+    """
+    posts = []
+    token = pending_posts.set(posts)
+    try:
+        yield
+    finally:
+        pending_posts.reset(token)
+        flush_posts(posts)
+
+
+def remember_posts(rows, sitemap=False):
+    """
+    rows — итерируемое из (pk, author_id, group_id). sitemap=True для
+    созданных и удалённых постов: их шард карты сайта устаревает.
+    """
+    pending_posts.get().extend(
+        (pk, author_id, group_id, sitemap) for pk, author_id, group_id in rows
+    )
+
+
+def flush_posts(posts):
+    if not posts:
+        return
+    usernames = User.objects.filter(
+        pk__in={author_id for _, author_id, _, _ in posts}
+    ).values_list('username', flat=True)
+    slugs = Group.objects.filter(
+        pk__in={group_id for _, _, group_id, _ in posts if group_id}
+    ).values_list('slug', flat=True)
+    bump_versions(
+        ['index']
+        + [f'author:{username}' for username in usernames]
+        + [f'group:{slug}' for slug in slugs]
+    )
+    shards = {
+        sitemaps.shard_of(pk): pk for pk, _, _, sitemap in posts if sitemap
+    }
+    for pk in shards.values():
+        sitemaps.invalidate('posts', pk)
+
+
+@receiver(pre_save, sender=Post)
+def remember_old_group(sender, instance, **kwargs):
+    instance._old_group_slug = None
+    if instance.pk:
+        instance._old_group_slug = Post.objects.filter(
+            pk=instance.pk
+        ).values_list('group__slug', flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def invalidate_post_caches(sender, instance, **kwargs):
+    if pending_posts.get() is not None:
+        remember_posts(
+            [(instance.pk, instance.author_id, instance.group_id)],
+            sitemap=kwargs['created'],
+        )
+        old_group_slug = getattr(instance, '_old_group_slug', None)
+        if old_group_slug:
+            bump_versions([f'group:{old_group_slug}'])
+        return
+    group_slug = instance.group.slug if instance.group_id else None
+    scopes = post_scopes(instance, group_slug)
+    old_group_slug = getattr(instance, '_old_group_slug', None)
+    if old_group_slug and old_group_slug != group_slug:
+        scopes.append(f'group:{old_group_slug}')
+    bump_versions(scopes)
+    if kwargs['created']:
+        sitemaps.invalidate('posts', instance.pk)
+
+
+@receiver(post_delete, sender=Post)
+def invalidate_post_caches_on_delete(sender, instance, **kwargs):
+    if pending_posts.get() is not None:
+        remember_posts(
+            [(instance.pk, instance.author_id, instance.group_id)],
+            sitemap=True,
+        )
+        return
+    group_slug = Group.objects.filter(
+        pk=instance.group_id
+    ).values_list('slug', flat=True).first()
+    bump_versions(post_scopes(instance, group_slug))
+    sitemaps.invalidate('posts', instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+def place_comment(sender, instance, created, **kwargs):
+    if created:
+        threads.place(instance)
+
+
+@receiver(post_save, sender=User)
+def update_user_indexes(sender, instance, created,
+                        update_fields=None, **kwargs):
+    if update_fields is not None and update_fields <= {'last_login'}:
+        return
+    sitemaps.invalidate('profiles', instance.pk)
+    deleted = UserTombstone.objects.filter(user_id=instance.pk).exists()
+    keys = [] if deleted else [instance.username]
+    autocomplete.users.update(instance.pk, keys, instance.username)
+
+
+@receiver(post_delete, sender=User)
+def update_user_indexes_on_delete(sender, instance, **kwargs):
+    sitemaps.invalidate('profiles', instance.pk)
+    autocomplete.users.update(instance.pk)
+
+
+@receiver(post_save, sender=Group)
+def update_group_indexes(sender, instance, **kwargs):
+    sitemaps.invalidate('groups', instance.pk)
+    keys = [] if instance.is_deleted else [instance.slug, instance.title]
+    autocomplete.groups.update(
+        instance.pk, keys, (instance.slug, instance.title)
+    )
+
+
+@receiver(post_delete, sender=Group)
+def update_group_indexes_on_delete(sender, instance, **kwargs):
+    sitemaps.invalidate('groups', instance.pk)
+    autocomplete.groups.update(instance.pk)
@@ -0,0 +1,131 @@
+from django.core.cache import cache
+from django.db.models import F, Max
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils.html import escape
+
+from .models import Group, Post, User
+
+SHARD_SIZE = 10000
+SITEMAP_TIMEOUT = 60 * 60
+INDEX_TIMEOUT = 10 * 60
+CHUNK_SIZE = 2000
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+URLSET_OPEN = (
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+INDEX_OPEN = (
+    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+
+
+def post_entries(start, end):
+    rows = Post.objects.visible().filter(
+        pk__gte=start, pk__lt=end
+    ).order_by('pk').values_list('pk', 'pub_date').iterator(
+        chunk_size=CHUNK_SIZE
+    )
+    for pk, pub_date in rows:
+        yield reverse('posts:post_detail', args=[pk]), pub_date
+
+
+def profile_entries(start, end):
+    rows = User.objects.filter(
+        pk__gte=start, pk__lt=end, tombstone__isnull=True
+    ).order_by('pk').values_list('username', flat=True).iterator(
+        chunk_size=CHUNK_SIZE
+    )
+    for username in rows:
+        yield reverse('posts:profile', args=[username]), None
+
+
+def group_entries(start, end):
+    rows = Group.objects.filter(
+        pk__gte=start, pk__lt=end, is_deleted=False
+    ).order_by(
+        'pk'
+    ).values_list('slug', flat=True).iterator(chunk_size=CHUNK_SIZE)
+    for slug in rows:
+        yield reverse('posts:group_list', args=[slug]), None
+
+
+SECTIONS = {
+    'posts': (Post, post_entries),
+    'profiles': (User, profile_entries),
+    'groups': (Group, group_entries),
+}
+
+
+def shard_of(pk):
+    return pk // SHARD_SIZE
+
+
+def section_key(section, shard):
+    return f'sitemap:{section}:{shard}'
+
+
+def invalidate(section, pk):
+    cache.delete(section_key(section, shard_of(pk)))
+    cache.delete('sitemap:index')
+
+
+def invalidate_posts(posts):
+    """Сбрасывает шарды всех постов выборки: номера шардов считает база."""
+    shards = posts.order_by().annotate(
+        shard=F('pk') / SHARD_SIZE
+    ).values_list('shard', flat=True).distinct()
+    cache.delete_many([section_key('posts', shard) for shard in shards])
+    cache.delete('sitemap:index')
+
+
+def render_urlset(request, entries):
+    parts = [XML_HEADER, URLSET_OPEN]
+    for path, lastmod in entries:
+        parts.append(f'<url><loc>{escape(request.build_absolute_uri(path))}'
+                     '</loc>')
+        if lastmod is not None:
+            parts.append(f'<lastmod>{lastmod.date().isoformat()}</lastmod>')
+        parts.append('</url>\n')
+    parts.append('</urlset>\n')
+    return ''.join(parts)
+
+
+def sitemap_index(request):
+    """
+    Индекс карт сайта: по карте на каждый диапазон id в SHARD_SIZE.
+
+    Для расчёта нужен только MAX(id) каждой таблицы, а он читается
+    по первичному ключу.
+    """
+    content = cache.get('sitemap:index')
+    if content is None:
+        parts = [XML_HEADER, INDEX_OPEN]
+        for section, (model, _) in SECTIONS.items():
+            last = model.objects.aggregate(last=Max('pk'))['last'] or 0
+            for shard in range(shard_of(last) + 1):
+                path = reverse(
+                    'posts:sitemap_section', args=[section, shard]
+                )
+                parts.append(
+                    '<sitemap><loc>'
+                    f'{escape(request.build_absolute_uri(path))}'
+                    '</loc></sitemap>\n'
+                )
+        parts.append('</sitemapindex>\n')
+        content = ''.join(parts)
+        cache.set('sitemap:index', content, INDEX_TIMEOUT)
+    return HttpResponse(content, content_type='application/xml')
+
+
+def sitemap_section(request, section, shard):
+    if section not in SECTIONS:
+        raise Http404('Нет такого раздела карты сайта')
+    key = section_key(section, shard)
+    content = cache.get(key)
+    if content is None:
+        _, entries = SECTIONS[section]
+        start = shard * SHARD_SIZE
+        content = render_urlset(request, entries(start, start + SHARD_SIZE))
+        cache.set(key, content, SITEMAP_TIMEOUT)
+    return HttpResponse(content, content_type='application/xml')
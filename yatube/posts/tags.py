@@ -0,0 +1,61 @@
+import re
+
+from .models import Mention, PostTag, Tag, User
+
+TAG_RE = re.compile(r'(?<!\w)#(\w{1,100})')
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.@+-]{1,150})')
+
+
+def extract_tags(text):
+    return {name.lower() for name in TAG_RE.findall(text)}
+
+
+def extract_mentions(text):
+    return {name.rstrip('.') for name in MENTION_RE.findall(text)}
+
+
+def get_tags(names):
+    """Возвращает {имя: id} для тегов, создавая недостающие одним запросом."""
+    tags = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+    missing = names - tags.keys()
+    if missing:
+        Tag.objects.bulk_create(
+            [Tag(name=name) for name in missing], ignore_conflicts=True
+        )
+        tags.update(
+            Tag.objects.filter(name__in=missing).values_list('name', 'pk')
+        )
+    return tags
+
+
+def index_posts(posts):
+    """
+    Перестраивает теги и упоминания для пачки постов.
+
+    Число запросов не зависит от размера пачки: старые связи удаляются,
+    теги и пользователи разрешаются через IN, новые связи пишутся
+    через bulk_create.
+    """
+    posts = list(posts)
+    if not posts:
+        return
+    post_tags = {post.pk: extract_tags(post.text) for post in posts}
+    post_mentions = {post.pk: extract_mentions(post.text) for post in posts}
+    tags = get_tags(set().union(*post_tags.values()))
+    users = dict(User.objects.filter(
+        username__in=set().union(*post_mentions.values())
+    ).values_list('username', 'pk'))
+
+    PostTag.objects.filter(post__in=posts).delete()
+    Mention.objects.filter(post__in=posts).delete()
+    PostTag.objects.bulk_create([
+        PostTag(post=post, tag_id=tags[name], pub_date=post.pub_date)
+        for post in posts
+        for name in post_tags[post.pk]
+    ])
+    Mention.objects.bulk_create([
+        Mention(post=post, user_id=users[name], pub_date=post.pub_date)
+        for post in posts
+        for name in post_mentions[post.pk]
+        if name in users
+    ])
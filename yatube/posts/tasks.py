@@ -0,0 +1,45 @@
+from sorl.thumbnail import get_thumbnail
+
+from tasks.queue import task
+
+from . import bulk
+from .models import Post
+from .recommendations import compute_suggestions
+from .trending import compute_trending
+
+THUMBNAIL_GEOMETRY = '960x339'
+THUMBNAIL_OPTIONS = {'crop': 'center', 'upscale': True}
+
+
+@task()
+def warm_thumbnails(post_id):
+    """Заранее строит миниатюру, чтобы первый рендер ленты её не ждал."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return
+    get_thumbnail(post.image, THUMBNAIL_GEOMETRY, **THUMBNAIL_OPTIONS)
+
+
+@task(priority=-10)
+def refresh_trending():
+    compute_trending()
+
+
+@task(priority=-10)
+def refresh_suggestions():
+    compute_suggestions()
+
+
+@task(priority=-5)
+def delete_posts(post_ids):
+    bulk.delete_posts(post_ids)
+
+
+@task(priority=-5)
+def move_posts(post_ids, group_id):
+    bulk.move_posts(post_ids, group_id)
+
+
+@task(priority=-5)
+def reassign_posts(post_ids, author_id):
+    bulk.reassign_posts(post_ids, author_id)
@@ -0,0 +1,155 @@
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from tasks.models import Task
+
+from .. import bulk, versions
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class HighVolumeAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='secret'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание группы',
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def add_rows(self, count):
+        authors = [
+            User.objects.create_user(username=f'author{User.objects.count()}')
+            for _ in range(count)
+        ]
+        for author in authors:
+            post = Post.objects.create(
+                text='Текст', author=author, group=self.group
+            )
+            Comment.objects.create(post=post, author=author, text='Текст')
+            Follow.objects.create(user=self.admin, author=author)
+
+    def changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return [query['sql'] for query in context.captured_queries]
+
+    def test_changelists_without_n_plus_one(self):
+        """Число запросов списка не зависит от числа строк на странице."""
+        for model in ('post', 'comment', 'follow'):
+            url = reverse(f'admin:posts_{model}_changelist')
+            with self.subTest(model=model):
+                self.add_rows(2)
+                before = len(self.changelist_queries(url))
+                self.add_rows(5)
+                self.assertEqual(len(self.changelist_queries(url)), before)
+
+    def test_no_full_scans(self):
+        """Без фильтров нет COUNT(*) и DISTINCT по всей таблице."""
+        self.add_rows(3)
+        queries = self.changelist_queries(
+            reverse('admin:posts_post_changelist')
+        )
+        post_table = Post._meta.db_table
+        for sql in queries:
+            if post_table in sql:
+                self.assertNotIn('COUNT(', sql)
+                self.assertNotIn('DISTINCT', sql)
+
+    def test_date_hierarchy_drilldown(self):
+        """Иерархия дат по-прежнему ведёт к годам и месяцам."""
+        self.add_rows(1)
+        post = Post.objects.get()
+        url = reverse('admin:posts_post_changelist')
+        response = self.client.get(url, {'pub_date__year': post.pub_date.year})
+        self.assertContains(response, f'pub_date__month={post.pub_date.month}')
+
+
+class BulkActionsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='secret'
+        )
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание группы',
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+        Post.objects.bulk_create([
+            Post(text=f'Пост {i}', author=self.author) for i in range(7)
+        ])
+        for post in Post.objects.all():
+            Comment.objects.create(post=post, author=self.admin, text='Ок')
+        self.post_ids = list(Post.objects.values_list('pk', flat=True))
+
+    def run_action(self, action, **extra):
+        response = self.client.post(
+            reverse('admin:posts_post_changelist'),
+            {'action': action, '_selected_action': self.post_ids, **extra},
+        )
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        call_command('run_tasks', once=True, processes=0, stdout=StringIO())
+        return Task.objects.get()
+
+    def test_delete_in_background(self):
+        """Удаление уходит в очередь и выполняется пачками с прогрессом."""
+        with mock.patch.object(bulk, 'CHUNK_SIZE', 3), mock.patch.object(
+            bulk, 'report_progress', wraps=bulk.report_progress
+        ) as report_progress:
+            task = self.run_action('delete_in_background')
+        self.assertEqual(report_progress.call_count, 4)
+        self.assertEqual(task.status, Task.DONE)
+        self.assertEqual((task.progress, task.total), (7, 7))
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+
+    def test_move_to_group(self):
+        """Посты переносятся в группу, указанную в форме действия."""
+        version = versions.get_version(f'group:{self.group.slug}')
+        self.run_action('move_to_group', group=self.group.slug)
+        self.assertEqual(self.group.posts.count(), 7)
+        self.assertNotEqual(
+            versions.get_version(f'group:{self.group.slug}'), version
+        )
+
+    def test_reassign_author(self):
+        """Посты передаются другому автору."""
+        self.run_action('reassign_author', author='admin')
+        self.assertEqual(self.admin.posts.count(), 7)
+
+    def test_unknown_target_not_enqueued(self):
+        """Несуществующая группа — сообщение об ошибке, без задачи."""
+        self.client.post(
+            reverse('admin:posts_post_changelist'),
+            {
+                'action': 'move_to_group',
+                '_selected_action': self.post_ids,
+                'group': 'missing',
+            },
+        )
+        self.assertFalse(Task.objects.exists())
@@ -0,0 +1,204 @@
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from .. import autocomplete, follows
+from ..models import Comment, Follow, Group, Post
+from ..paginators import LAST_POSTS
+
+User = get_user_model()
+
+
+class PostsApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание группы',
+        )
+        Post.objects.bulk_create([
+            Post(text=f'Тестовый текст {i}', author=cls.user, group=cls.group)
+            for i in range(LAST_POSTS + 3)
+        ])
+        cls.post = Post.objects.first()
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text='Комментарий'
+        )
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_feeds_paginated_by_cursor(self):
+        """Ленты API листаются курсором до конца без повторов."""
+        urls = (
+            reverse('posts:api_index'),
+            reverse('posts:api_group_list', args=[self.group.slug]),
+            reverse('posts:api_profile', args=[self.user.username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                first = self.client.get(url).json()
+                self.assertEqual(len(first['results']), LAST_POSTS)
+                second = self.client.get(first['next']).json()
+                self.assertEqual(len(second['results']), 3)
+                self.assertIsNone(second['next'])
+                ids = [
+                    row['id'] for row in first['results'] + second['results']
+                ]
+                self.assertEqual(len(set(ids)), LAST_POSTS + 3)
+
+    def test_fields_selector(self):
+        """fields= ограничивает поля ответа, неизвестные поля — ошибка."""
+        url = reverse('posts:api_index')
+        row = self.client.get(url, {'fields': 'id,author'}).json()
+        self.assertEqual(
+            row['results'][0], {'id': self.post.pk, 'author': 'test_user'}
+        )
+        response = self.client.get(url, {'fields': 'id,password'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
+    def test_post_detail_and_comments(self):
+        """Отдельный пост и его комментарии доступны в API."""
+        detail = self.client.get(
+            reverse('posts:api_post_detail', args=[self.post.pk])
+        ).json()
+        self.assertEqual(detail['text'], self.post.text)
+        self.assertEqual(detail['group'], self.group.slug)
+        self.assertIsNone(detail['image'])
+        comments = self.client.get(
+            reverse('posts:api_comments', args=[self.post.pk])
+        ).json()
+        self.assertEqual(comments['results'][0]['text'], 'Комментарий')
+
+    def test_etag_returns_not_modified(self):
+        """Повторный запрос с If-None-Match получает 304 без тела."""
+        url = reverse('posts:api_index')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+
+class AutocompleteTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for username in ('anna', 'andrey', 'boris'):
+            User.objects.create_user(username=username)
+        Group.objects.create(
+            title='Котики', slug='cats', description='Про котиков'
+        )
+
+    def setUp(self):
+        autocomplete.users.entries = None
+        autocomplete.groups.entries = None
+
+    def test_users_by_prefix(self):
+        """Пользователи ищутся по префиксу без учёта регистра."""
+        response = self.client.get(
+            reverse('posts:api_autocomplete_users'), {'q': 'AN'}
+        )
+        self.assertEqual(response.json()['results'], ['andrey', 'anna'])
+
+    def test_groups_by_title_or_slug(self):
+        """Группы ищутся и по названию, и по slug."""
+        url = reverse('posts:api_autocomplete_groups')
+        expected = [{'slug': 'cats', 'title': 'Котики'}]
+        for query in ('кот', 'ca'):
+            with self.subTest(query=query):
+                response = self.client.get(url, {'q': query})
+                self.assertEqual(response.json()['results'], expected)
+
+    def test_index_updated_incrementally(self):
+        """Переименование и удаление сразу видны в индексе."""
+        self.assertEqual(autocomplete.users.search('bor'), ['boris'])
+        user = User.objects.get(username='boris')
+        user.username = 'bogdan'
+        user.save()
+        self.assertEqual(autocomplete.users.search('bor'), [])
+        self.assertEqual(autocomplete.users.search('bog'), ['bogdan'])
+        user.delete()
+        self.assertEqual(autocomplete.users.search('bo'), [])
+
+    def test_other_process_applies_changes(self):
+        """Другой процесс подтягивает изменения из журнала без перестройки."""
+        other = autocomplete.PrefixIndex('users', autocomplete.load_users)
+        self.assertEqual(other.search('bor'), ['boris'])
+        user = User.objects.get(username='boris')
+        user.username = 'bogdan'
+        user.save()
+        other.checked = 0
+        with mock.patch.object(other, 'rebuild') as rebuild:
+            self.assertEqual(other.search('bog'), ['bogdan'])
+        rebuild.assert_not_called()
+        self.assertEqual(other.search('bor'), [])
+
+
+class BulkFollowApiTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='reader')
+        self.authors = [
+            User.objects.create_user(username=f'author_{i}') for i in range(3)
+        ]
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('posts:api_follows')
+
+    def post(self, data):
+        return self.client.post(
+            self.url, data, content_type='application/json'
+        )
+
+    def test_follow_and_unfollow_in_one_request(self):
+        """Подписки и отписки пачкой; повторная подписка не падает."""
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        response = self.post({
+            'follow': ['author_0', 'author_1', 'reader', 'missing'],
+            'unfollow': ['author_0', 'author_2'],
+        })
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json(), {
+            'followed': ['author_1'], 'unfollowed': ['author_0'],
+        })
+        self.assertEqual(
+            list(self.user.follower.values_list(
+                'author__username', flat=True
+            )),
+            ['author_1'],
+        )
+
+    def test_counters_dropped_after_change(self):
+        """Счётчики подписок пересчитываются после изменения."""
+        self.assertEqual(
+            follows.follow_counts(self.authors[1])['followers'], 0
+        )
+        self.post({'follow': ['author_1']})
+        self.assertEqual(
+            follows.follow_counts(self.authors[1])['followers'], 1
+        )
+        self.assertEqual(follows.follow_counts(self.user)['following'], 1)
+
+    def test_rejects_bad_requests(self):
+        """Гость, кривой JSON и слишком большая пачка отклоняются."""
+        too_many = [f'user_{i}' for i in range(follows.MAX_BULK_FOLLOWS + 1)]
+        cases = (
+            (Client(), {'follow': ['author_0']}, HTTPStatus.UNAUTHORIZED),
+            (self.client, ['author_0'], HTTPStatus.BAD_REQUEST),
+            (self.client, {'follow': [1]}, HTTPStatus.BAD_REQUEST),
+            (self.client, {'follow': too_many}, HTTPStatus.BAD_REQUEST),
+        )
+        for client, data, status in cases:
+            with self.subTest(data=data):
+                response = client.post(
+                    self.url, data, content_type='application/json'
+                )
+                self.assertEqual(response.status_code, status)
+        self.assertFalse(Follow.objects.exists())
@@ -0,0 +1,313 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from ..models import Comment, Follow, Group, Post, PostSignature, PostTag
+from ..threads import segment
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class CleanMediaCommandTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'), exist_ok=True)
+        for name in ('used.gif', 'orphan.gif'):
+            with open(os.path.join(TEMP_MEDIA_ROOT, 'posts', name), 'wb'):
+                pass
+        Post.objects.create(
+            text='Тестовый текст',
+            author=self.user,
+            image='posts/used.gif',
+        )
+
+    def path(self, name):
+        return os.path.join(TEMP_MEDIA_ROOT, 'posts', name)
+
+    def test_dry_run_keeps_files(self):
+        """Пробный запуск ничего не удаляет."""
+        out = StringIO()
+        call_command('clean_media', dry_run=True, min_age=-1, stdout=out)
+        self.assertTrue(os.path.exists(self.path('orphan.gif')))
+        self.assertIn('Будет удалено: 1', out.getvalue())
+
+    def test_orphans_removed(self):
+        """Удаляются только файлы, на которые не ссылается пост."""
+        call_command('clean_media', min_age=-1, stdout=StringIO())
+        self.assertTrue(os.path.exists(self.path('used.gif')))
+        self.assertFalse(os.path.exists(self.path('orphan.gif')))
+
+    def test_orphans_quarantined(self):
+        """Файлы переносятся в карантин вместо удаления."""
+        quarantine = tempfile.mkdtemp()
+        call_command(
+            'clean_media', min_age=-1, quarantine=quarantine,
+            stdout=StringIO(),
+        )
+        self.assertFalse(os.path.exists(self.path('orphan.gif')))
+        self.assertTrue(
+            os.path.exists(os.path.join(quarantine, 'posts', 'orphan.gif'))
+        )
+        shutil.rmtree(quarantine)
+
+    def test_fresh_files_skipped(self):
+        """Свежие файлы не трогаются: пост может быть ещё не сохранён."""
+        call_command('clean_media', stdout=StringIO())
+        self.assertTrue(os.path.exists(self.path('orphan.gif')))
+
+    def test_other_media_kept(self):
+        """Файлы вне каталога загрузок постов не считаются сиротами."""
+        other = os.path.join(TEMP_MEDIA_ROOT, 'avatars', 'user.gif')
+        os.makedirs(os.path.dirname(other), exist_ok=True)
+        with open(other, 'wb'):
+            pass
+        call_command('clean_media', min_age=-1, stdout=StringIO())
+        self.assertTrue(os.path.exists(other))
+
+    def test_quarantine_inside_media_refused(self):
+        """Карантин внутри MEDIA_ROOT отклоняется, файлы не трогаются."""
+        quarantine = os.path.join(TEMP_MEDIA_ROOT, 'quarantine')
+        with self.assertRaises(CommandError):
+            call_command(
+                'clean_media', min_age=-1, quarantine=quarantine,
+                stdout=StringIO(),
+            )
+        self.assertTrue(os.path.exists(self.path('orphan.gif')))
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_MAX_SIZE=(100, 100))
+class NormalizeImagesCommandTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        os.makedirs(os.path.join(TEMP_MEDIA_ROOT, 'posts'), exist_ok=True)
+        self.path = os.path.join(TEMP_MEDIA_ROOT, 'posts', 'big.png')
+        Image.new('RGB', (300, 150)).save(self.path)
+        self.post = Post.objects.create(
+            text='Тестовый текст',
+            author=self.user,
+            image='posts/big.png',
+        )
+
+    def test_existing_images_downscaled(self):
+        """Пост переходит на уменьшенную копию, старый файл удаляется."""
+        call_command('normalize_images', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertNotEqual(self.post.image.name, 'posts/big.png')
+        self.assertFalse(os.path.exists(self.path))
+        with Image.open(self.post.image.path) as image:
+            self.assertEqual(image.size, (100, 50))
+
+    def test_dry_run_keeps_images(self):
+        """Пробный запуск не меняет файлы."""
+        call_command('normalize_images', dry_run=True, stdout=StringIO())
+        with Image.open(self.path) as image:
+            self.assertEqual(image.size, (300, 150))
+
+
+class ReindexTagsCommandTests(TestCase):
+    def test_tags_rebuilt_for_existing_posts(self):
+        """Команда строит индекс тегов для постов, созданных в обход форм."""
+        user = User.objects.create_user(username='test_user')
+        Post.objects.bulk_create([
+            Post(text=f'Пост {i} #старое', author=user) for i in range(5)
+        ])
+        call_command('reindex_tags', batch_size=2, stdout=StringIO())
+        self.assertEqual(
+            PostTag.objects.filter(tag__name='старое').count(), 5
+        )
+
+
+class IndexSignaturesCommandTests(TestCase):
+    def test_existing_duplicates_flagged(self):
+        """Команда строит подписи и с --flag помечает более поздние копии."""
+        user = User.objects.create_user(username='test_user')
+        text = (
+            'Одинаковый текст рекламного поста, который бот публикует '
+            'снова и снова под номером'
+        )
+        Post.objects.bulk_create([
+            Post(text=f'{text} {i}', author=user) for i in range(3)
+        ])
+        call_command(
+            'index_signatures', batch_size=2, flag=True, stdout=StringIO()
+        )
+        first = Post.objects.order_by('pk').first()
+        self.assertEqual(PostSignature.objects.count(), 3)
+        self.assertIsNone(first.signature.duplicate_of)
+        self.assertEqual(
+            PostSignature.objects.filter(duplicate_of__isnull=False).count(),
+            2,
+        )
+
+    def test_old_duplicates_flagged(self):
+        """Копии старше окна сравниваются с постами своего времени."""
+        user = User.objects.create_user(username='test_user')
+        text = (
+            'Давний текст рекламного поста, который бот публиковал '
+            'снова и снова под номером'
+        )
+        Post.objects.bulk_create([
+            Post(text=f'{text} {i}', author=user) for i in range(2)
+        ])
+        Post.objects.update(pub_date=timezone.now() - timedelta(days=90))
+        call_command('index_signatures', flag=True, stdout=StringIO())
+        self.assertEqual(
+            PostSignature.objects.filter(duplicate_of__isnull=False).count(),
+            1,
+        )
+
+
+class ExportDataCommandTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание группы',
+        )
+        Post.objects.bulk_create([
+            Post(text=f'Пост {i}', author=cls.user, group=cls.group)
+            for i in range(5)
+        ])
+        Post.objects.create(text='Пост без группы', author=cls.user)
+
+    def export(self, *args, **options):
+        out = StringIO()
+        call_command('export_data', *args, chunk_size=2, stdout=out,
+                     **options)
+        return out.getvalue().splitlines()
+
+    def test_ndjson_export_streams_all_rows(self):
+        """NDJSON-выгрузка отдаёт все строки, несмотря на пачки."""
+        lines = [json.loads(line) for line in self.export('posts')]
+        self.assertEqual(len(lines), 6)
+        self.assertEqual(lines[0]['type'], 'post')
+        self.assertEqual(lines[0]['author'], 'test_user')
+
+    def test_csv_export_filtered_by_group(self):
+        """CSV-выгрузка фильтруется по группе и начинается с заголовка."""
+        lines = self.export('posts', format='csv', group='test_slug')
+        self.assertTrue(lines[0].startswith('id,text,pub_date'))
+        self.assertEqual(len(lines), 6)
+
+    def test_export_view_for_staff_only(self):
+        """HTTP-выгрузка доступна только персоналу и идёт потоком."""
+        url = reverse('posts:export', kwargs={'kind': 'posts'})
+        self.assertEqual(self.client.get(url).status_code, 302)
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        self.client.force_login(staff)
+        response = self.client.get(url, {'since': '2000-01-01'})
+        self.assertTrue(response.streaming)
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(len(body.splitlines()), 6)
+        response = self.client.get(url, {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(url, {'since': '2024-02-30'})
+        self.assertEqual(response.status_code, 400)
+
+
+class ImportDataCommandTests(TestCase):
+    def setUp(self):
+        self.records = [
+            {'type': 'post', 'id': 10, 'text': 'Старый пост #архив',
+             'pub_date': '2015-03-01T10:00:00+00:00',
+             'author': 'old_author', 'group': 'old_group', 'image': ''},
+            {'type': 'comment', 'id': 20, 'post': 10, 'author': 'reader',
+             'text': 'Комментарий', 'created': '2015-03-02T10:00:00+00:00'},
+            {'type': 'comment', 'id': 21, 'post': 999, 'author': 'reader',
+             'text': 'К потерянному посту', 'created': None},
+            {'type': 'follow', 'user': 'reader', 'author': 'old_author'},
+        ]
+        self.path = tempfile.mktemp(suffix='.ndjson')
+        with open(self.path, 'w', encoding='utf-8') as file:
+            for record in self.records:
+                file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_import_preserves_ids_and_dates(self):
+        """Импорт сохраняет исходные id и даты и создаёт авторов и группы."""
+        call_command('import_data', self.path, chunk_size=2,
+                     stdout=StringIO())
+        post = Post.objects.get(pk=10)
+        self.assertEqual(post.pub_date.year, 2015)
+        self.assertEqual(post.author.username, 'old_author')
+        self.assertEqual(post.group.slug, 'old_group')
+        self.assertEqual(post.comments.get().created.year, 2015)
+        self.assertFalse(Comment.objects.filter(pk=21).exists())
+        self.assertTrue(Follow.objects.filter(
+            user__username='reader', author__username='old_author'
+        ).exists())
+        self.assertTrue(PostTag.objects.filter(post=post).exists())
+        self.assertFalse(os.path.exists(self.path + '.checkpoint'))
+        self.assertTrue(Post._meta.get_field('pub_date').auto_now_add)
+
+    def test_import_resumes_from_checkpoint(self):
+        """Импорт продолжается с позиции, сохранённой в контрольной точке."""
+        with open(self.path, 'rb') as file:
+            file.readline()
+            offset = file.tell()
+        with open(self.path + '.checkpoint', 'w') as file:
+            file.write(str(offset))
+        call_command('import_data', self.path, stdout=StringIO())
+        self.assertFalse(Post.objects.exists())
+        self.assertTrue(Follow.objects.exists())
+
+    def test_repeated_import_is_idempotent(self):
+        """Повторный импорт тех же записей не создаёт дублей."""
+        for _ in range(2):
+            call_command('import_data', self.path, restart=True,
+                         stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_reply_threads_rebuilt(self):
+        """Ответы встают в ветку родителя, даже из следующей пачки."""
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps({
+                'type': 'comment', 'id': 22, 'post': 10, 'parent': 20,
+                'author': 'old_author', 'text': 'Ответ', 'created': None,
+            }) + '\n')
+        for _ in range(2):
+            call_command('import_data', self.path, chunk_size=2,
+                         restart=True, stdout=StringIO())
+        root, reply = Comment.objects.order_by('pk')
+        self.assertEqual((reply.parent, reply.depth), (root, 1))
+        self.assertEqual(reply.path, root.path + segment(reply.pk))
+        self.assertEqual(root.reply_count, 1)
@@ -0,0 +1,133 @@
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from tasks.models import Task
+
+from .. import deletion
+from ..models import Comment, Follow, Group, Post, UserTombstone
+
+User = get_user_model()
+
+
+class TombstoneDeletionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='secret'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        self.client = Client()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание группы',
+        )
+        Post.objects.bulk_create([
+            Post(text=f'Пост {i}', author=self.author, group=self.group)
+            for i in range(5)
+        ])
+        self.other_post = Post.objects.create(
+            text='Чужой пост', author=self.reader, group=self.group
+        )
+        Comment.objects.create(
+            post=self.other_post, author=self.author, text='Комментарий'
+        )
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def run_worker(self):
+        with mock.patch.object(deletion, 'CHUNK_SIZE', 2):
+            call_command(
+                'run_tasks', once=True, processes=0, stdout=StringIO()
+            )
+
+    def test_user_hidden_immediately(self):
+        """До вычистки посты, комментарии и профиль автора скрыты."""
+        deletion.delete_user(self.author)
+        self.assertTrue(Post.objects.filter(author=self.author).exists())
+        response = self.client.get(reverse('posts:index'))
+        self.assertEqual(list(response.context['page_obj']), [self.other_post])
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.other_post.pk])
+        )
+        self.assertFalse(response.context['comments'].exists())
+        response = self.client.get(
+            reverse('posts:profile', args=[self.author.username])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_user_reaped_in_background(self):
+        """Фоновая задача вычищает зависимые строки и самого автора."""
+        deletion.delete_user(self.author)
+        self.run_worker()
+        self.assertEqual(Task.objects.get().status, Task.DONE)
+        self.assertFalse(User.objects.filter(username='author').exists())
+        self.assertEqual(list(Post.objects.all()), [self.other_post])
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+
+    def test_group_posts_detached_in_background(self):
+        """Группа сразу не открывается, посты отвязываются в фоне."""
+        deletion.delete_group(self.group)
+        response = self.client.get(
+            reverse('posts:group_list', args=[self.group.slug])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.run_worker()
+        self.assertFalse(Group.objects.exists())
+        self.assertEqual(Post.objects.filter(group__isnull=True).count(), 6)
+
+    def test_restored_user_not_reaped(self):
+        """Если пользователя успели восстановить, задача его не трогает."""
+        deletion.delete_user(self.author)
+        UserTombstone.objects.filter(user=self.author).delete()
+        self.run_worker()
+        self.assertEqual(Post.objects.filter(author=self.author).count(), 5)
+
+    def test_deactivated_user_stays_visible(self):
+        """Деактивация без удаления не прячет и не вычищает контент."""
+        self.author.is_active = False
+        self.author.save()
+        deletion.reap(User._meta.label, self.author.pk)
+        self.assertEqual(Post.objects.visible().filter(
+            author=self.author
+        ).count(), 5)
+        response = self.client.get(
+            reverse('posts:profile', args=[self.author.username])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_admin_delete_tombstones(self):
+        """Удаление из админки только помечает группу."""
+        self.client.force_login(self.admin)
+        url = reverse('admin:posts_group_delete', args=[self.group.pk])
+        self.assertEqual(self.client.get(url).status_code, HTTPStatus.OK)
+        self.client.post(url, {'post': 'yes'})
+        self.group.refresh_from_db()
+        self.assertTrue(self.group.is_deleted)
+        self.assertEqual(self.group.posts.count(), 6)
+
+    def test_admin_delete_needs_cascade_permissions(self):
+        """Без права удалять посты нельзя удалить и их автора."""
+        staff = User.objects.create_user(username='staff', is_staff=True)
+        staff.user_permissions.set(Permission.objects.filter(
+            codename__in=('view_user', 'delete_user')
+        ))
+        self.client.force_login(staff)
+        url = reverse('admin:auth_user_delete', args=[self.author.pk])
+        self.assertEqual(
+            self.client.post(url, {'post': 'yes'}).status_code,
+            HTTPStatus.FORBIDDEN,
+        )
+        self.author.refresh_from_db()
+        self.assertTrue(self.author.is_active)
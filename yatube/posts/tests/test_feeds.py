@@ -0,0 +1,145 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import deletion
+from ..models import Group, Post
+from ..sitemaps import shard_of
+
+User = get_user_model()
+
+
+class SyndicationFeedsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание группы',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст поста',
+            author=cls.user,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def test_feeds_available(self):
+        """RSS и Atom доступны для главной, группы и автора."""
+        urls = (
+            reverse('posts:index_rss'),
+            reverse('posts:index_atom'),
+            reverse('posts:group_rss', args=[self.group.slug]),
+            reverse('posts:group_atom', args=[self.group.slug]),
+            reverse('posts:profile_rss', args=[self.user.username]),
+            reverse('posts:profile_atom', args=[self.user.username]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertIn(self.post.text, response.content.decode())
+        response = self.client.get(reverse('posts:group_rss', args=['none']))
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_conditional_get_without_queries(self):
+        """Повторный опрос без изменений получает 304 без запросов к базе."""
+        url = reverse('posts:group_rss', args=[self.group.slug])
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_new_post_invalidates_feeds(self):
+        """Новый пост меняет ETag и попадает в закешированные ленты."""
+        urls = (
+            reverse('posts:index_rss'),
+            reverse('posts:group_rss', args=[self.group.slug]),
+            reverse('posts:profile_rss', args=[self.user.username]),
+        )
+        etags = {url: self.client.get(url)['ETag'] for url in urls}
+        Post.objects.create(
+            text='Свежая запись', author=self.user, group=self.group
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=etags[url]
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertIn('Свежая запись', response.content.decode())
+
+
+class SitemapTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test_slug',
+            description='Тестовое описание группы',
+        )
+        cls.post = Post.objects.create(
+            text='Тестовый текст поста',
+            author=cls.user,
+            group=cls.group,
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def section(self, section, pk):
+        url = reverse(
+            'posts:sitemap_section', args=[section, shard_of(pk)]
+        )
+        return self.client.get(url).content.decode()
+
+    def test_index_lists_shards(self):
+        """Индекс ссылается на шард каждого раздела."""
+        content = self.client.get(reverse('posts:sitemap_index')).content
+        for section in ('posts', 'profiles', 'groups'):
+            with self.subTest(section=section):
+                self.assertIn(f'sitemap-{section}-0.xml', content.decode())
+
+    def test_sections_contain_urls(self):
+        """Шарды содержат ссылки на посты, профили и группы."""
+        expected = (
+            ('posts', self.post.pk,
+             reverse('posts:post_detail', args=[self.post.pk])),
+            ('profiles', self.user.pk,
+             reverse('posts:profile', args=[self.user.username])),
+            ('groups', self.group.pk,
+             reverse('posts:group_list', args=[self.group.slug])),
+        )
+        for section, pk, path in expected:
+            with self.subTest(section=section):
+                self.assertIn(path, self.section(section, pk))
+        response = self.client.get(
+            reverse('posts:sitemap_section', args=['secret', 0])
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_new_post_invalidates_its_shard(self):
+        """Новый пост сбрасывает кеш своего шарда."""
+        self.section('posts', self.post.pk)
+        post = Post.objects.create(text='Новый пост', author=self.user)
+        self.assertIn(
+            reverse('posts:post_detail', args=[post.pk]),
+            self.section('posts', post.pk),
+        )
+
+    def test_deleted_author_posts_leave_sitemap(self):
+        """Посты удаляемого автора сразу пропадают из карты сайта."""
+        path = reverse('posts:post_detail', args=[self.post.pk])
+        self.assertIn(path, self.section('posts', self.post.pk))
+        deletion.delete_user(self.user)
+        self.assertNotIn(path, self.section('posts', self.post.pk))
@@ -1,18 +1,22 @@
 from http import HTTPStatus
+from io import BytesIO
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 from django.conf import settings
+from PIL import Image
+import shutil
 import tempfile
 
-from ..models import Group, Post, Comment
+from ..models import Group, Post, PostSignature, Comment
 
 User = get_user_model()
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -31,6 +35,11 @@ class PostFormTests(TestCase):
             description='Тестовое описание другой группы',
         )
 
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
     def setUp(self):
         small_gif = (
             b'\x47\x49\x46\x38\x39\x61\x02\x00'
@@ -125,3 +134,99 @@ class PostFormTests(TestCase):
             follow=True)
         self.assertEqual(Comment.objects.count(), comments_count + 1)
         self.assertTrue(Comment.objects.filter(id=1).exists())
+
+    @override_settings(POST_IMAGE_MAX_SIZE=(100, 100))
+    def test_uploaded_image_normalized(self):
+        """Загруженная картинка уменьшается и теряет метаданные."""
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        buffer = BytesIO()
+        Image.new('RGB', (400, 200)).save(buffer, 'JPEG', exif=exif)
+        form_data = {
+            'text': 'Пост с большой картинкой',
+            'image': SimpleUploadedFile(
+                name='big.jpg',
+                content=buffer.getvalue(),
+                content_type='image/jpeg',
+            ),
+        }
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data=form_data,
+            follow=True
+        )
+        post = Post.objects.get(text=form_data['text'])
+        with Image.open(post.image) as image:
+            self.assertEqual(image.size, (100, 50))
+            self.assertNotIn('exif', image.info)
+
+    def test_unwritable_image_format_rejected(self):
+        """Картинка, которую Pillow не может записать, не даёт ошибки 500."""
+        xpm = (
+            b'/* XPM */\nstatic char *image[] = {\n"1 1 1 1",\n'
+            b'"a c #FF0000",\n"a"\n};\n'
+        )
+        form_data = {
+            'text': 'Пост с картинкой XPM',
+            'image': SimpleUploadedFile(
+                name='image.xpm', content=xpm, content_type='image/x-xpixmap'
+            ),
+        }
+        response = self.authorized_client.post(
+            reverse('posts:post_create'), data=form_data
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['form'].has_error('image'))
+        self.assertFalse(Post.objects.filter(text=form_data['text']).exists())
+
+
+class DuplicatePostTests(TestCase):
+    text = (
+        'Только сегодня уникальное предложение: скидки на всё до '
+        'девяноста процентов, переходите по ссылке в профиле'
+    )
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='spammer')
+        cls.other = User.objects.create_user(username='other')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def create(self, client, text):
+        return client.post(reverse('posts:post_create'), {'text': text})
+
+    def test_own_near_duplicate_rejected(self):
+        """Почти такой же пост того же автора не публикуется."""
+        self.create(self.client, self.text)
+        response = self.create(self.client, self.text + '!!! Спешите')
+        self.assertFormError(
+            response, 'form', 'text',
+            'Вы недавно публиковали почти такой же пост.'
+        )
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_foreign_near_duplicate_flagged(self):
+        """Похожий пост другого автора публикуется, но помечается."""
+        self.create(self.client, self.text)
+        other_client = Client()
+        other_client.force_login(self.other)
+        self.create(other_client, self.text.upper())
+        original, copy = Post.objects.order_by('pk')
+        self.assertEqual(copy.signature.duplicate_of, original)
+        self.assertIsNone(original.signature.duplicate_of)
+
+    def test_different_texts_pass(self):
+        """Разные тексты не считаются дубликатами, короткие не сверяются."""
+        self.create(self.client, self.text)
+        self.create(self.client, (
+            'Сегодня ходили в поход на озеро, видели бобров, рыбачили '
+            'и пекли картошку в костре до самой темноты'
+        ))
+        self.create(self.client, 'Привет')
+        self.create(self.client, 'Привет')
+        self.assertEqual(Post.objects.count(), 4)
+        self.assertEqual(PostSignature.objects.count(), 2)
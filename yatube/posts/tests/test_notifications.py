@@ -0,0 +1,89 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .. import notifications
+from ..models import Follow, Notification, Post
+
+User = get_user_model()
+
+
+@mock.patch.object(notifications, 'DIGEST_INTERVAL', timedelta(days=1000))
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.readers = [
+            User.objects.create_user(username=f'reader{i}') for i in range(3)
+        ]
+        cls.gone = User.objects.create_user(
+            username='gone', is_active=False
+        )
+        for user in [*cls.readers, cls.gone]:
+            Follow.objects.create(user=user, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.readers[0])
+
+    def publish(self, text):
+        self.author_client.post(reverse('posts:post_create'), {'text': text})
+        with mock.patch.object(notifications, 'CHUNK_SIZE', 2):
+            call_command(
+                'run_tasks', once=True, processes=0, stdout=StringIO()
+            )
+
+    def unread(self):
+        response = self.reader_client.get(
+            reverse('posts:api_unread_notifications')
+        )
+        return response.json()['unread']
+
+    def test_posts_coalesced_into_one_digest(self):
+        """Записи одного интервала собираются в одну сводку."""
+        self.publish('Первая запись')
+        self.publish('Вторая запись')
+        latest = Post.objects.get(text='Вторая запись')
+        self.assertEqual(
+            sorted(Notification.objects.values_list(
+                'user__username', 'posts', 'latest_post'
+            )),
+            [(reader.username, 2, latest.pk) for reader in self.readers],
+        )
+        self.assertEqual(self.unread(), 1)
+
+    def test_read_digest_reopened_by_new_post(self):
+        """Просмотр сбрасывает счётчик, новая запись снова его поднимает."""
+        self.publish('Первая запись')
+        response = self.reader_client.get(reverse('posts:notifications'))
+        self.assertEqual(response.context['digests'][0].posts, 1)
+        self.assertEqual(self.unread(), 0)
+        self.publish('Вторая запись')
+        self.assertEqual(self.unread(), 1)
+
+    def test_retry_does_not_double_count(self):
+        """Повтор задачи для той же записи не меняет сводки."""
+        post = Post.objects.create(text='Запись', author=self.author)
+        notifications.notify_followers(post.pk)
+        notifications.notify_followers(post.pk)
+        self.assertEqual(
+            list(Notification.objects.values_list('posts', flat=True)),
+            [1, 1, 1],
+        )
+        self.assertEqual(self.unread(), 1)
+
+    def test_guest_gets_401(self):
+        """Гостю счётчик непрочитанного не отдаётся."""
+        response = Client().get(reverse('posts:api_unread_notifications'))
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
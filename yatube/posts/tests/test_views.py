@@ -1,10 +1,25 @@
+from io import StringIO
+from unittest import mock
+
 from django import forms
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
-from django.test import Client, TestCase
+from django.core.management import call_command
+from django.core.paginator import Page
+from django.db import DatabaseError, connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
-from ..models import Group, Post, User, Follow
+from .. import (
+    counters, deletion, follow_feed, follows, likes, threads, viewer
+)
+from ..models import (
+    Comment, Follow, Group, LikeCount, Mention, Post, Tag, TrendingPost,
+    User
+)
+from ..recommendations import compute_suggestions
+from ..trending import compute_trending
 from ..paginators import LAST_POSTS
 
 User = get_user_model()
@@ -190,3 +205,543 @@ class PaginatorViewsTest(TestCase):
                     reverse_ + '?page=2').context.get('page_obj')),
                     self.posts_on_second_page
                 )
+
+
+class PostSearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+        cls.post = Post.objects.create(
+            text='Кошки любят рыбу',
+            author=cls.user,
+        )
+        Post.objects.create(text='Собаки любят кости', author=cls.user)
+
+    def search(self, query):
+        response = self.client.get(reverse('posts:search'), {'q': query})
+        return list(response.context['page_obj'])
+
+    def test_search_finds_posts_by_words(self):
+        """Поиск находит посты по словам и префиксам."""
+        self.assertEqual(self.search('кошки'), [self.post])
+        self.assertEqual(self.search('рыб'), [self.post])
+        self.assertEqual(len(self.search('любят')), 2)
+        self.assertEqual(self.search('"; DROP'), [])
+
+    def test_search_index_follows_changes(self):
+        """Индекс обновляется при изменении и удалении поста."""
+        self.post.text = 'Кошки любят молоко'
+        self.post.save()
+        self.assertEqual(self.search('рыбу'), [])
+        self.assertEqual(self.search('молоко'), [self.post])
+        self.post.delete()
+        self.assertEqual(self.search('молоко'), [])
+
+
+# Тесты публикуют больше постов, чем пропускает ограничение частоты.
+@override_settings(RATE_LIMITS={})
+class TagFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='test_user')
+        cls.friend = User.objects.create_user(username='friend')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_post(self, text):
+        self.authorized_client.post(
+            reverse('posts:post_create'), {'text': text}
+        )
+        return Post.objects.get(text=text)
+
+    def test_tags_and_mentions_indexed_on_create_and_edit(self):
+        """Теги и упоминания извлекаются при создании и правке поста."""
+        post = self.create_post('Привет, @friend! #Котики #котики #еда')
+        self.assertEqual(
+            set(post.post_tags.values_list('tag__name', flat=True)),
+            {'котики', 'еда'},
+        )
+        self.assertTrue(
+            Mention.objects.filter(post=post, user=self.friend).exists()
+        )
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            {'text': 'Только #еда'},
+        )
+        self.assertEqual(
+            list(post.post_tags.values_list('tag__name', flat=True)),
+            ['еда'],
+        )
+        self.assertFalse(Mention.objects.filter(post=post).exists())
+
+    def test_tag_feed_uses_cursor_pagination(self):
+        """Лента тега листается курсором без пропусков и повторов."""
+        posts = [
+            self.create_post(f'Пост {i} #лента')
+            for i in range(LAST_POSTS + 3)
+        ]
+        url = reverse('posts:tag_posts', kwargs={'name': 'Лента'})
+        first = self.client.get(url).context
+        self.assertEqual(first['tag'], Tag.objects.get(name='лента'))
+        self.assertTrue(first['page_obj'].has_next)
+        second = self.client.get(
+            url, {'cursor': first['page_obj'].next_cursor}
+        ).context
+        self.assertFalse(second['page_obj'].has_next)
+        seen = first['posts'] + second['posts']
+        self.assertEqual(len(seen), len(posts))
+        self.assertEqual(set(seen), set(posts))
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.readers = [
+            User.objects.create_user(username=f'reader{i}') for i in range(3)
+        ]
+        cls.quiet = Post.objects.create(text='Тихий пост', author=cls.author)
+        cls.busy = Post.objects.create(text='Горячий пост', author=cls.author)
+        cls.discussed = Post.objects.create(
+            text='Обсуждаемый пост', author=cls.author
+        )
+        for reader in cls.readers:
+            Comment.objects.create(
+                post=cls.busy, author=reader, text='Комментарий'
+            )
+        Comment.objects.create(
+            post=cls.discussed, author=cls.readers[0], text='Комментарий'
+        )
+
+    def test_trending_ranked_by_engagement(self):
+        """Популярное упорядочено по вовлечённости, без тихих постов."""
+        compute_trending()
+        response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(
+            response.context['posts'], [self.busy, self.discussed]
+        )
+
+    def test_new_followers_count_for_all_author_posts(self):
+        """Новые подписчики автора поднимают все его свежие посты."""
+        Follow.objects.create(user=self.readers[0], author=self.author)
+        compute_trending()
+        self.assertEqual(
+            TrendingPost.objects.filter(post=self.quiet).count(), 1
+        )
+
+
+class FollowSuggestionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.newcomer = User.objects.create_user(username='newcomer')
+        cls.friends = [
+            User.objects.create_user(username=f'friend{i}') for i in range(2)
+        ]
+        cls.popular = User.objects.create_user(username='popular')
+        cls.niche = User.objects.create_user(username='niche')
+        for friend in cls.friends:
+            Follow.objects.create(user=cls.reader, author=friend)
+            Follow.objects.create(user=friend, author=cls.popular)
+        Follow.objects.create(user=cls.friends[0], author=cls.niche)
+        Follow.objects.create(user=cls.friends[0], author=cls.reader)
+
+    def setUp(self):
+        self.client = Client()
+        compute_suggestions(batch_users=2)
+
+    def suggested(self, user):
+        self.client.force_login(user)
+        response = self.client.get(reverse('posts:follow_index'))
+        return [
+            suggestion.suggested
+            for suggestion in response.context['suggestions']
+        ]
+
+    def test_ranked_by_co_follows(self):
+        """Рекомендации упорядочены по числу общих подписок без себя."""
+        self.assertEqual(
+            self.suggested(self.reader), [self.popular, self.niche]
+        )
+
+    def test_newcomer_gets_popular_authors(self):
+        """Без подписок показываются самые читаемые авторы."""
+        self.assertEqual(self.suggested(self.newcomer)[0], self.popular)
+
+    def test_followed_after_compute_hidden(self):
+        """Подписка после пересчёта сразу убирает автора из рекомендаций."""
+        Follow.objects.create(user=self.reader, author=self.popular)
+        self.assertEqual(self.suggested(self.reader), [self.niche])
+
+
+@override_settings(VIEW_COUNT_FLUSH_INTERVAL=60 * 60)
+class ViewCounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.posts = [
+            Post.objects.create(text=f'Пост {i}', author=cls.author)
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        counters.views.pending.clear()
+
+    def test_views_buffered_until_flush(self):
+        """Просмотры видны сразу, а в базу пишутся только при сбросе."""
+        url = reverse('posts:post_detail', args=[self.posts[0].pk])
+        for expected in (1, 2, 3):
+            response = self.client.get(url)
+            self.assertEqual(response.context['views'], expected)
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].views, 0)
+        self.assertEqual(counters.views.flush(), 3)
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].views, 3)
+        response = self.client.get(url)
+        self.assertEqual(response.context['views'], 4)
+
+    def test_flush_adds_to_stored_counts(self):
+        """Сброс прибавляет прирост к сохранённым значениям."""
+        Post.objects.filter(pk=self.posts[1].pk).update(views=10)
+        for post, hits in zip(self.posts, (2, 2, 5)):
+            for _ in range(hits):
+                counters.views.record(post.pk)
+        counters.views.flush()
+        self.assertEqual(
+            [post.views for post in Post.objects.order_by('pk')],
+            [2, 12, 5],
+        )
+
+    @override_settings(VIEW_COUNT_FLUSH_SIZE=2)
+    def test_full_buffer_wakes_writer(self):
+        """Переполненный буфер будит фоновую запись, а не пишет в запросе."""
+        counter = counters.ViewCounter()
+        counter.record(self.posts[0].pk)
+        self.assertFalse(counter.wakeup.is_set())
+        counter.record(self.posts[1].pk)
+        self.assertTrue(counter.wakeup.is_set())
+        self.assertTrue(counter.due())
+        self.assertEqual(
+            sorted(Post.objects.values_list('views', flat=True)), [0, 0, 0]
+        )
+
+    def test_failed_flush_keeps_views(self):
+        """Если база недоступна, просмотры остаются в буфере."""
+        counter = counters.ViewCounter()
+        counter.record(self.posts[0].pk)
+        counter.record(self.posts[0].pk)
+        with mock.patch.object(
+            Post.objects, 'filter', side_effect=DatabaseError
+        ):
+            self.assertEqual(counter.flush(), 0)
+        counter.record(self.posts[0].pk)
+        self.assertEqual(counter.buffered(self.posts[0].pk), 3)
+        self.assertEqual(counter.flush(), 3)
+        self.posts[0].refresh_from_db()
+        self.assertEqual(self.posts[0].views, 3)
+
+
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='commenter')
+        cls.post = Post.objects.create(text='Пост', author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def reply(self, parent, text):
+        return Comment.objects.create(
+            post=self.post, author=self.user, text=text, parent=parent
+        )
+
+    def chain(self, length):
+        comments = [self.reply(None, 'Корень')]
+        for i in range(length - 1):
+            comments.append(self.reply(comments[-1], f'Ответ {i}'))
+        return comments
+
+    def test_reply_through_form(self):
+        """Ответ из формы встаёт в ветку и увеличивает счётчики предков."""
+        root, child = self.chain(2)
+        response = self.client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Ответ на ответ', 'parent': child.pk},
+        )
+        self.assertRedirects(
+            response,
+            reverse('posts:comment_thread', args=[self.post.pk, child.pk]),
+        )
+        reply = Comment.objects.get(text='Ответ на ответ')
+        self.assertEqual(reply.parent, child)
+        self.assertEqual(reply.depth, 2)
+        self.assertTrue(reply.path.startswith(child.path))
+        root.refresh_from_db()
+        child.refresh_from_db()
+        self.assertEqual((root.reply_count, child.reply_count), (2, 1))
+
+    def test_deep_replies_loaded_lazily(self):
+        """Глубокие ответы открываются отдельной веткой."""
+        comments = self.chain(threads.INLINE_DEPTH + 2)
+        sibling = self.reply(None, 'Второй корень')
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertEqual(
+            list(response.context['comments']),
+            comments[:threads.INLINE_DEPTH] + [sibling],
+        )
+        deepest = comments[threads.INLINE_DEPTH - 1]
+        self.assertContains(
+            response,
+            reverse('posts:comment_thread', args=[self.post.pk, deepest.pk]),
+        )
+        response = self.client.get(
+            reverse('posts:comment_thread', args=[self.post.pk, deepest.pk])
+        )
+        self.assertEqual(
+            list(response.context['comments']),
+            comments[threads.INLINE_DEPTH - 1:],
+        )
+
+    def test_depth_is_capped(self):
+        """Ответы глубже предела становятся соседями родителя."""
+        comments = self.chain(threads.MAX_DEPTH + 3)
+        self.assertEqual(
+            max(Comment.objects.values_list('depth', flat=True)),
+            threads.MAX_DEPTH,
+        )
+        self.assertEqual(
+            Comment.objects.get(pk=comments[-1].pk).parent_id,
+            comments[threads.MAX_DEPTH - 1].pk,
+        )
+
+    def test_delete_subtree_updates_counts(self):
+        """Удаление ветки уменьшает счётчики ответов у предков."""
+        root, child, grandchild = self.chain(3)
+        self.reply(child, 'Ещё ответ')
+        threads.delete_subtrees([child])
+        root.refresh_from_db()
+        self.assertEqual(root.reply_count, 0)
+        self.assertEqual(list(Comment.objects.all()), [root])
+
+    def test_replies_lifted_when_author_removed(self):
+        """Ответы на комментарии удалённого автора поднимаются выше."""
+        other = User.objects.create_user(username='other')
+        root = self.reply(None, 'Корень')
+        child = Comment.objects.create(
+            post=self.post, author=other, text='Ответ', parent=root
+        )
+        grandchild = self.reply(child, 'Ответ на ответ')
+        last = Comment.objects.create(
+            post=self.post, author=other, text='Последний', parent=grandchild
+        )
+        threads.delete_keeping_replies([root.pk, grandchild.pk])
+        child.refresh_from_db()
+        last.refresh_from_db()
+        self.assertEqual(
+            (child.parent_id, child.depth, child.path, child.reply_count),
+            (None, 0, threads.segment(child.pk), 1),
+        )
+        self.assertEqual(
+            (last.parent_id, last.depth, last.path),
+            (child.pk, 1, child.path + threads.segment(last.pk)),
+        )
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertEqual(list(response.context['comments']), [child, last])
+
+
+class LikeTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.users = [
+            User.objects.create_user(username=f'fan{i}')
+            for i in range(likes.SHARDS + 2)
+        ]
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.users[0])
+
+    def test_like_and_unlike(self):
+        """Повторный лайк не удваивается, отмена возвращает счётчик."""
+        like_url = reverse('posts:like_post', args=[self.post.pk])
+        index = reverse('posts:index')
+        for _ in range(2):
+            response = self.client.post(like_url, {'next': index})
+            self.assertRedirects(response, index)
+        self.assertEqual(likes.like_counts([self.post.pk]), {self.post.pk: 1})
+        response = self.client.post(
+            reverse('posts:unlike_post', args=[self.post.pk]),
+            {'next': 'https://evil.example/'},
+        )
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertEqual(likes.like_counts([self.post.pk]), {self.post.pk: 0})
+
+    def test_counter_spread_over_shards(self):
+        """Лайки разных людей пишутся в разные строки счётчика."""
+        for user in self.users:
+            likes.like(user, self.post.pk)
+        likes.unlike(self.users[1], self.post.pk)
+        self.assertEqual(
+            likes.like_counts([self.post.pk]),
+            {self.post.pk: len(self.users) - 1},
+        )
+        self.assertEqual(
+            LikeCount.objects.filter(post=self.post).count(), likes.SHARDS
+        )
+
+    def test_index_shows_own_like_at_once(self):
+        """Свой лайк и подписка сразу видны на закешированной главной."""
+        index = reverse('posts:index')
+        self.assertNotContains(self.client.get(index), 'btn-danger')
+        self.client.post(reverse('posts:like_post', args=[self.post.pk]))
+        self.assertContains(self.client.get(index), 'btn-danger')
+        version = viewer.state_version(self.users[0])
+        with mock.patch.object(
+            follows.transaction, 'on_commit', lambda func: func()
+        ):
+            follows.follow_many(self.users[0], [self.author.pk])
+        self.assertNotEqual(viewer.state_version(self.users[0]), version)
+
+    def test_reaped_users_likes_subtracted(self):
+        """Лайки вычищенного пользователя вычитаются из счётчика."""
+        other = Post.objects.create(text='Другой пост', author=self.author)
+        for user in self.users[:3]:
+            likes.like(user, self.post.pk)
+        likes.like(self.users[0], other.pk)
+        deletion.delete_user(self.users[0])
+        call_command('run_tasks', once=True, processes=0, stdout=StringIO())
+        self.assertEqual(
+            likes.like_counts([self.post.pk, other.pk]),
+            {self.post.pk: 2, other.pk: 0},
+        )
+
+    def test_feed_state_does_not_grow_with_page(self):
+        """Состояние лайков ленты не добавляет запросов на карточку."""
+        def queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as captured:
+                self.client.get(reverse('posts:index'))
+            return len(captured)
+
+        before = queries()
+        Post.objects.bulk_create([
+            Post(text=f'Пост {i}', author=self.author) for i in range(9)
+        ])
+        for post in Post.objects.all():
+            likes.like(self.users[0], post.pk)
+        self.assertEqual(queries(), before)
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        self.assertTrue(all(
+            post.liked and post.like_count == 1
+            for post in response.context['page_obj']
+        ))
+
+
+class ViewerStateTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.viewer = User.objects.create_user(username='viewer')
+        cls.followed = User.objects.create_user(username='followed')
+        cls.stranger = User.objects.create_user(username='stranger')
+        Follow.objects.create(user=cls.viewer, author=cls.followed)
+        cls.own = Post.objects.create(text='Мой пост', author=cls.viewer)
+        cls.liked = Post.objects.create(text='Пост', author=cls.followed)
+        cls.other = Post.objects.create(text='Чужой', author=cls.stranger)
+        likes.like(cls.viewer, cls.liked.pk)
+
+    def test_facts_resolved_in_one_query_per_kind(self):
+        """Подписки, лайки и счётчики — по одному запросу на страницу."""
+        posts = list(Post.objects.order_by('pk'))
+        authors = [self.stranger]
+        with self.assertNumQueries(3):
+            viewer.load_viewer_state(self.viewer, posts, authors)
+        self.assertEqual(
+            [
+                (post.is_own, post.following_author, post.liked)
+                for post in posts
+            ],
+            [(True, False, False), (False, True, True),
+             (False, False, False)],
+        )
+        self.assertFalse(self.stranger.followed)
+
+    def test_profile_uses_viewer_state(self):
+        """Профиль берёт подписку из состояния зрителя."""
+        client = Client()
+        client.force_login(self.viewer)
+        response = client.get(
+            reverse('posts:profile', args=[self.followed.username])
+        )
+        self.assertIs(response.context['following'], True)
+        self.assertTrue(response.context['page_obj'][0].liked)
+
+
+class FollowFeedCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.stranger = User.objects.create_user(username='stranger')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def feed(self):
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertIsInstance(response.context['page_obj'], Page)
+        return list(response.context['page_obj'])
+
+    def test_repeated_visit_served_from_cache(self):
+        """Повторная страница берётся из кеша, чужие посты его не трогают."""
+        self.assertEqual(self.feed(), [self.post])
+        Post.objects.create(text='Посторонний', author=self.stranger)
+        self.assertEqual(self.feed(), [self.post])
+        self.assertEqual(follow_feed.stats(), {'hits': 1, 'misses': 1})
+
+    def test_new_post_of_followed_author_invalidates(self):
+        """Запись автора из подписок сразу видна в ленте."""
+        self.feed()
+        new = Post.objects.create(text='Новый', author=self.author)
+        self.assertEqual(self.feed(), [new, self.post])
+        self.assertEqual(follow_feed.stats()['misses'], 2)
+
+    def test_follow_change_invalidates(self):
+        """Подписка и отписка меняют поколение ленты пользователя."""
+        self.feed()
+        other = Post.objects.create(text='Другой', author=self.stranger)
+        # В TestCase транзакция не коммитится, поэтому обработчики
+        # on_commit вызываются сразу.
+        with mock.patch.object(
+            follows.transaction, 'on_commit', lambda func: func()
+        ):
+            follows.follow_many(self.reader, [self.stranger.pk])
+            self.assertEqual(self.feed(), [other, self.post])
+            follows.unfollow_many(self.reader, [self.author.pk])
+            self.assertEqual(self.feed(), [other])
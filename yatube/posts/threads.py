@@ -0,0 +1,147 @@
+from django.db import transaction
+from django.db.models import CharField, F, Value
+from django.db.models.functions import Concat, Substr
+
+from .models import Comment
+
+SEGMENT = 10
+MAX_DEPTH = 8
+INLINE_DEPTH = 3
+
+
+def segment(pk):
+    """Часть пути одного комментария: id фиксированной ширины."""
+    return f'{pk:0{SEGMENT}d}'
+
+
+def ancestor_ids(path):
+    """id всех комментариев на пути, от корня до самого комментария."""
+    return [
+        int(path[start:start + SEGMENT])
+        for start in range(0, len(path), SEGMENT)
+    ]
+
+
+def locate(prefix, pk):
+    """
+    Родитель, путь и глубина комментария pk, отвечающего в ветке prefix.
+
+    Ответы глубже MAX_DEPTH становятся соседями своего родителя.
+    """
+    prefix = prefix[:SEGMENT * MAX_DEPTH]
+    ancestors = ancestor_ids(prefix)
+    parent_id = ancestors[-1] if ancestors else None
+    return parent_id, prefix + segment(pk), len(ancestors)
+
+
+def place(comment):
+    """
+    Записывает путь и глубину только что созданного комментария.
+
+    Путь — id предков и самого комментария подряд, поэтому сортировка
+    по пути обходит дерево в глубину, а ветка целиком — это диапазон
+    path__startswith по индексу (post, path). Счётчики ответов всех
+    предков растут одним UPDATE.
+    """
+    prefix = ''
+    if comment.parent_id:
+        prefix = Comment.objects.filter(
+            pk=comment.parent_id
+        ).values_list('path', flat=True).first() or ''
+    comment.parent_id, comment.path, comment.depth = locate(
+        prefix, comment.pk
+    )
+    with transaction.atomic():
+        Comment.objects.filter(pk=comment.pk).update(
+            parent_id=comment.parent_id,
+            path=comment.path,
+            depth=comment.depth,
+        )
+        Comment.objects.filter(
+            pk__in=ancestor_ids(comment.path)[:-1]
+        ).update(reply_count=F('reply_count') + 1)
+
+
+def delete_subtrees(comments):
+    """
+    Удаляет комментарии вместе с ответами и уменьшает счётчики предков.
+
+    Каждая ветка удаляется одним DELETE по диапазону пути.
+    """
+    for comment in comments:
+        with transaction.atomic():
+            deleted, _ = Comment.objects.filter(
+                post_id=comment.post_id, path__startswith=comment.path
+            ).delete()
+            Comment.objects.filter(
+                pk__in=ancestor_ids(comment.path)[:-1]
+            ).update(reply_count=F('reply_count') - deleted)
+
+
+def delete_keeping_replies(pks):
+    """
+    Удаляет комментарии, поднимая их ответы на уровень выше.
+
+    Так вычищаются комментарии удалённого пользователя: чужие ответы
+    на них не пропадают и не остаются сиротами вне дерева. Из пути
+    ответов вырезается сегмент удаляемого комментария, ответы первого
+    уровня переходят к его родителю, корень уступает место своим
+    ответам. Комментарии обходятся от глубоких к мелким, поэтому пути
+    ещё не обработанных не меняются.
+    """
+    comments = Comment.objects.filter(pk__in=pks).order_by('-depth').only(
+        'pk', 'post_id', 'parent_id', 'path', 'depth'
+    )
+    for comment in comments:
+        cut = len(comment.path)
+        Comment.objects.filter(
+            post_id=comment.post_id,
+            path__startswith=comment.path,
+            depth__gt=comment.depth,
+        ).update(
+            path=Concat(
+                Value(comment.path[:-SEGMENT]), Substr('path', cut + 1),
+                output_field=CharField(),
+            ),
+            depth=F('depth') - 1,
+        )
+        Comment.objects.filter(parent_id=comment.pk).update(
+            parent_id=comment.parent_id
+        )
+        Comment.objects.filter(
+            pk__in=ancestor_ids(comment.path)[:-1]
+        ).update(reply_count=F('reply_count') - 1)
+    Comment.objects.filter(pk__in=pks).delete()
+
+
+def visible(queryset):
+    return queryset.filter(
+        author__tombstone__isnull=True
+    ).select_related('author')
+
+
+def page_comments(post, roots):
+    """
+    Ветки корневых комментариев страницы одним запросом.
+
+    Корни страницы идут подряд в порядке путей, поэтому их ветки — один
+    диапазон путей. Ответы глубже INLINE_DEPTH не загружаются: на них
+    ведёт ссылка на отдельную ветку.
+    """
+    roots = list(roots)
+    if not roots:
+        return post.comments.none()
+    return visible(post.comments.filter(
+        path__gte=roots[0].path,
+        path__lt=roots[-1].path + '~',
+        depth__lt=INLINE_DEPTH,
+    )).order_by('path')
+
+
+def subtree(comment):
+    """Ветка комментария на INLINE_DEPTH уровней вниз, по порядку путей."""
+    return visible(Comment.objects.filter(
+        post_id=comment.post_id,
+        path__startswith=comment.path,
+        depth__lt=comment.depth + INLINE_DEPTH,
+    )).order_by('path')
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Comment, Follow, Post, TrendingPost
+
+WINDOW = timedelta(days=7)
+TOP_SIZE = 100
+GRAVITY = 1.5
+COMMENT_WEIGHT = 1.0
+COMMENTER_WEIGHT = 2.0
+FOLLOW_WEIGHT = 0.5
+
+
+def engagement(since):
+    """
+    Собирает сигналы вовлечённости тремя агрегатными запросами.
+
+    Возвращает {post_id: (pub_date, author_id)}, {post_id: (комментарии,
+    комментаторы)} и {author_id: новые подписчики} за окно.
+    """
+    posts = {
+        pk: (pub_date, author_id)
+        for pk, pub_date, author_id in Post.objects.filter(
+            pub_date__gte=since
+        ).values_list('pk', 'pub_date', 'author_id').order_by().iterator()
+    }
+    comments = {
+        row['post_id']: (row['comments'], row['commenters'])
+        for row in Comment.objects.filter(
+            post__pub_date__gte=since
+        ).order_by().values('post_id').annotate(
+            comments=Count('pk'),
+            commenters=Count('author', distinct=True),
+        )
+    }
+    follows = dict(
+        Follow.objects.filter(created__gte=since).order_by().values(
+            'author_id'
+        ).annotate(gained=Count('pk')).values_list('author_id', 'gained')
+    )
+    return posts, comments, follows
+
+
+def score_posts(posts, comments, follows, now):
+    """Рейтинг с затуханием по возрасту поста, как у Hacker News."""
+    scores = []
+    for pk, (pub_date, author_id) in posts.items():
+        comment_count, commenters = comments.get(pk, (0, 0))
+        points = (
+            COMMENT_WEIGHT * comment_count
+            + COMMENTER_WEIGHT * commenters
+            + FOLLOW_WEIGHT * follows.get(author_id, 0)
+        )
+        if not points:
+            continue
+        age_hours = (now - pub_date).total_seconds() / 3600
+        scores.append((points / (age_hours + 2) ** GRAVITY, pk))
+    scores.sort(reverse=True)
+    return scores
+
+
+def compute_trending(top_size=TOP_SIZE):
+    """Пересчитывает и сохраняет топ популярных постов."""
+    now = timezone.now()
+    scores = score_posts(*engagement(now - WINDOW), now)[:top_size]
+    with transaction.atomic():
+        TrendingPost.objects.all().delete()
+        TrendingPost.objects.bulk_create(
+            TrendingPost(post_id=pk, rank=rank, score=score, computed=now)
+            for rank, (score, pk) in enumerate(scores, start=1)
+        )
+    return len(scores)
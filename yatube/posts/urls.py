@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import api, feeds, sitemaps, views
 
 app_name = 'posts'
 
@@ -16,7 +16,26 @@ urlpatterns = [
         views.add_comment,
         name='add_comment',
     ),
+    path('posts/<int:post_id>/like/', views.like_post, name='like_post'),
+    path(
+        'posts/<int:post_id>/unlike/',
+        views.unlike_post,
+        name='unlike_post',
+    ),
+    path(
+        'posts/<int:post_id>/comments/<int:comment_id>/',
+        views.comment_thread,
+        name='comment_thread',
+    ),
+    path('trending/', views.trending, name='trending'),
+    path('tags/<str:name>/', views.tag_posts, name='tag_posts'),
+    path('search/', views.search, name='search'),
     path('follow/', views.follow_index, name='follow_index'),
+    path(
+        'notifications/',
+        views.notifications,
+        name='notifications',
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -27,4 +46,58 @@ urlpatterns = [
         views.profile_unfollow,
         name='profile_unfollow',
     ),
+    path('feeds/rss/', feeds.index_rss, name='index_rss'),
+    path('feeds/atom/', feeds.index_atom, name='index_atom'),
+    path('group/<slug:slug>/rss/', feeds.group_rss, name='group_rss'),
+    path('group/<slug:slug>/atom/', feeds.group_atom, name='group_atom'),
+    path(
+        'profile/<str:username>/rss/',
+        feeds.author_rss,
+        name='profile_rss',
+    ),
+    path(
+        'profile/<str:username>/atom/',
+        feeds.author_atom,
+        name='profile_atom',
+    ),
+    path('sitemap.xml', sitemaps.sitemap_index, name='sitemap_index'),
+    path(
+        'sitemap-<str:section>-<int:shard>.xml',
+        sitemaps.sitemap_section,
+        name='sitemap_section',
+    ),
+    path('export/<str:kind>/', views.export, name='export'),
+    path(
+        'api/autocomplete/users/',
+        api.autocomplete_users,
+        name='api_autocomplete_users',
+    ),
+    path(
+        'api/autocomplete/groups/',
+        api.autocomplete_groups,
+        name='api_autocomplete_groups',
+    ),
+    path('api/follows/', api.bulk_follow, name='api_follows'),
+    path(
+        'api/notifications/unread/',
+        api.unread_notifications,
+        name='api_unread_notifications',
+    ),
+    path('api/posts/', api.index, name='api_index'),
+    path('api/group/<slug:slug>/', api.group_posts, name='api_group_list'),
+    path(
+        'api/profile/<str:username>/',
+        api.profile,
+        name='api_profile',
+    ),
+    path(
+        'api/posts/<int:post_id>/',
+        api.post_detail,
+        name='api_post_detail',
+    ),
+    path(
+        'api/posts/<int:post_id>/comments/',
+        api.post_comments,
+        name='api_comments',
+    ),
 ]
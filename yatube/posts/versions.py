@@ -0,0 +1,27 @@
+import time
+
+from django.core.cache import cache
+
+
+def version_key(scope):
+    return f'feed_version:{scope}'
+
+
+def get_version(scope):
+    """
+    Номер версии закешированных данных области scope.
+
+    Начальное значение берётся из времени, чтобы после вытеснения ключа
+    версия не совпала с одной из прежних и старый ETag не стал валидным.
+    """
+    key = version_key(scope)
+    cache.add(key, int(time.time() * 1000), None)
+    return cache.get(key)
+
+
+def bump_versions(scopes):
+    for scope in scopes:
+        try:
+            cache.incr(version_key(scope))
+        except ValueError:
+            cache.set(version_key(scope), int(time.time() * 1000), None)
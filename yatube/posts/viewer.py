@@ -0,0 +1,93 @@
+from django.dispatch import receiver
+
+from .follows import follows_changed
+from .likes import like_counts, liked_ids
+from .models import Follow
+from .versions import bump_versions, get_version
+
+
+def scope(user_id):
+    return f'viewer:{user_id}'
+
+
+def state_version(user):
+    """
+    Версия состояния зрителя для ключей кеша фрагментов.
+
+    Меняется, когда зритель ставит или снимает лайк, подписывается или
+    отписывается: закешированные карточки не отстают от его собственных
+    действий. У гостя состояния нет, версия всегда одна.
+    """
+    if not user.is_authenticated:
+        return 0
+    return get_version(scope(user.pk))
+
+
+def bump_state(user_id):
+    bump_versions([scope(user_id)])
+
+
+class ViewerState:
+    """
+    Всё, что странице нужно знать о зрителе, одной пачкой.
+
+    Представление добавляет посты и авторов, которых покажет, затем
+    вызывает resolve(): каждый вид фактов — подписки, лайки, счётчики
+    лайков — загружается одним IN-запросом на всю страницу, а «мой ли
+    это пост» считается без запросов. Результат проставляется атрибутами
+    объектов, чтобы шаблоны ничего не запрашивали сами:
+
+    у поста — is_own, following_author, liked и like_count;
+    у автора — is_own и followed.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.posts = []
+        self.authors = []
+
+    def add_posts(self, posts):
+        self.posts.extend(posts)
+
+    def add_authors(self, authors):
+        self.authors.extend(authors)
+
+    def following_ids(self, author_ids):
+        if not self.user.is_authenticated or not author_ids:
+            return set()
+        return set(Follow.objects.filter(
+            user=self.user, author_id__in=author_ids
+        ).values_list('author_id', flat=True))
+
+    def resolve(self):
+        post_ids = {post.pk for post in self.posts}
+        author_ids = {post.author_id for post in self.posts} | {
+            author.pk for author in self.authors
+        }
+        counts = like_counts(post_ids) if post_ids else {}
+        liked = liked_ids(self.user, post_ids) if post_ids else set()
+        following = self.following_ids(author_ids - {self.user.pk})
+        for post in self.posts:
+            post.is_own = post.author_id == self.user.pk
+            post.following_author = post.author_id in following
+            post.liked = post.pk in liked
+            post.like_count = counts.get(post.pk, 0)
+        for author in self.authors:
+            author.is_own = author.pk == self.user.pk
+            author.followed = author.pk in following
+        return self
+
+
+def load_viewer_state(user, posts=(), authors=()):
+    """Собирает и разрешает состояние зрителя; возвращает список постов."""
+    posts = list(posts)
+    state = ViewerState(user)
+    state.add_posts(posts)
+    state.add_authors(authors)
+    state.resolve()
+    return posts
+
+
+@receiver(follows_changed)
+def drop_viewer_state(sender, user, **kwargs):
+    bump_state(user.pk)
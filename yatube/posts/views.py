@@ -1,25 +1,46 @@
-from .paginators import get_paginator
+from urllib.parse import quote
+
+from .paginators import get_paginator, get_cursor_page
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import transaction
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.utils.http import is_safe_url
+from django.views.decorators.http import require_POST
 from django.shortcuts import render, get_object_or_404, redirect
-from .models import Post, Group, User, Follow
+from .models import Comment, Post, Group, User, Tag, TrendingPost
 from django.contrib.auth.decorators import login_required
+from . import exports
+from .counters import record_view
+from .follow_feed import cached_page
+from .follows import follow_counts, follow_many, unfollow_many
+from .likes import like, unlike
+from .notifications import digests, mark_read, notify_followers
+from .duplicates import DUPLICATE_ERROR, find_duplicate, index_signatures
 from .forms import PostForm, CommentForm
-from django.views.decorators.cache import cache_page
+from .recommendations import get_suggestions
+from .search import search_posts
+from .tags import index_posts
+from .tasks import warm_thumbnails
+from .threads import INLINE_DEPTH, page_comments, subtree
+from .viewer import bump_state, load_viewer_state, state_version
 
 
-@cache_page(20)
 def index(request):
-    posts = Post.objects.select_related('author', 'group')
+    posts = Post.objects.for_feed()
     page_obj = get_paginator(posts, request)
+    load_viewer_state(request.user, page_obj)
     context = {
         'page_obj': page_obj,
+        'viewer_version': state_version(request.user),
     }
     return render(request, 'posts/index.html', context)
 
 
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.select_related('group')
+    group = get_object_or_404(Group, slug=slug, is_deleted=False)
+    posts = group.posts.for_feed()
     page_obj = get_paginator(posts, request)
+    load_viewer_state(request.user, page_obj)
     context = {
         'group': group,
         'page_obj': page_obj,
@@ -29,44 +50,125 @@ def group_posts(request, slug):
 
 def profile(request, username):
     user = request.user
-    author = get_object_or_404(User, username=username)
-    following = (
-        user.is_authenticated
-        and Follow.objects.filter(user=user, author=author)
+    author = get_object_or_404(
+        User, username=username, tombstone__isnull=True
     )
-    posts = author.posts.select_related('author', 'group')
+    posts = author.posts.for_feed()
     page_obj = get_paginator(posts, request)
+    load_viewer_state(user, page_obj, authors=[author])
     context = {
         'author': author,
         'page_obj': page_obj,
-        'following': following,
+        'following': author.followed,
+        'follow_counts': follow_counts(author),
+        'suggestions': get_suggestions(user),
     }
     return render(request, 'posts/profile.html', context)
 
 
 def post_detail(request, post_id):
-    post = get_object_or_404(
-        Post.objects.select_related('author', 'group'),
-        pk=post_id
-    )
+    post = get_object_or_404(Post.objects.for_feed(), pk=post_id)
+    load_viewer_state(request.user, [post])
     form = CommentForm(request.POST or None)
-    comments = post.comments.all()
+    roots = post.comments.filter(
+        depth=0, author__tombstone__isnull=True
+    ).order_by('path')
+    page_obj = get_paginator(roots, request)
     context = {
         'post': post,
         'form': form,
-        'comments': comments
+        'page_obj': page_obj,
+        'comments': page_comments(post, page_obj),
+        'deepest': INLINE_DEPTH - 1,
+        'views': record_view(post),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def comment_thread(request, post_id, comment_id):
+    comment = get_object_or_404(
+        Comment.objects.select_related('post', 'author'),
+        pk=comment_id,
+        post_id=post_id,
+        post__author__tombstone__isnull=True,
+    )
+    context = {
+        'post': comment.post,
+        'thread': comment,
+        'form': CommentForm(),
+        'comments': subtree(comment),
+        'deepest': comment.depth + INLINE_DEPTH - 1,
+    }
+    return render(request, 'posts/comment_thread.html', context)
+
+
+def trending(request):
+    ranking = TrendingPost.objects.filter(
+        post__author__tombstone__isnull=True
+    ).select_related(
+        'post__author',
+        'post__group',
+    )
+    page_obj = get_paginator(ranking, request)
+    context = {
+        'page_obj': page_obj,
+        'posts': load_viewer_state(
+            request.user, [item.post for item in page_obj]
+        ),
+    }
+    return render(request, 'posts/trending.html', context)
+
+
+def tag_posts(request, name):
+    tag = get_object_or_404(Tag, name=name.lower())
+    links = tag.post_links.filter(
+        post__author__tombstone__isnull=True
+    ).select_related(
+        'post__author',
+        'post__group',
+    )
+    page_obj = get_cursor_page(links, request, id_field='post_id')
+    context = {
+        'tag': tag,
+        'page_obj': page_obj,
+        'posts': load_viewer_state(
+            request.user, [link.post for link in page_obj]
+        ),
+    }
+    return render(request, 'posts/tag_posts.html', context)
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    posts = search_posts(Post.objects.for_feed(), query)
+    page_obj = get_paginator(posts, request)
+    load_viewer_state(request.user, page_obj)
+    context = {
+        'query': query,
+        'page_obj': page_obj,
+        'page_query': f'q={quote(query)}&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
     if not form.is_valid():
         return render(request, 'posts/create_post.html', {'form': form, })
+    duplicate = find_duplicate(form.cleaned_data['text'], request.user.pk)
+    if duplicate and duplicate.author_id == request.user.pk:
+        form.add_error('text', DUPLICATE_ERROR)
+        return render(request, 'posts/create_post.html', {'form': form, })
     post = form.save(commit=False)
     post.author = request.user
-    post.save()
+    with transaction.atomic():
+        post.save()
+        index_posts([post])
+        index_signatures([post], {post.pk: duplicate})
+        notify_followers.delay(post.pk)
+    if post.image:
+        warm_thumbnails.delay(post.pk)
     return redirect("posts:profile", post.author)
 
 
@@ -81,8 +183,19 @@ def post_edit(request, post_id):
         instance=post
     )
     if form.is_valid():
-        form.save()
-        return redirect('posts:post_detail', post_id)
+        duplicate = find_duplicate(
+            post.text, post.author_id, exclude=post.pk
+        )
+        if duplicate and duplicate.author_id == post.author_id:
+            form.add_error('text', DUPLICATE_ERROR)
+        else:
+            with transaction.atomic():
+                post = form.save()
+                index_posts([post])
+                index_signatures([post], {post.pk: duplicate})
+            if 'image' in form.changed_data and post.image:
+                warm_thumbnails.delay(post.pk)
+            return redirect('posts:post_detail', post_id)
 
     context = {
         'form': form,
@@ -98,44 +211,108 @@ def post_edit(request, post_id):
 def add_comment(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     form = CommentForm(request.POST or None)
+    parent_id = request.POST.get('parent', '')
+    parent = None
+    if parent_id.isdigit():
+        parent = post.comments.filter(pk=parent_id).first()
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
+        comment.parent = parent
         comment.save()
+    if parent:
+        return redirect(
+            'posts:comment_thread', post_id=post_id, comment_id=parent.pk
+        )
+    return redirect('posts:post_detail', post_id=post_id)
+
+
+def redirect_back(request, post_id):
+    target = request.POST.get('next', '')
+    if is_safe_url(target, allowed_hosts={request.get_host()}):
+        return redirect(target)
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@require_POST
+@login_required
+def like_post(request, post_id):
+    post = get_object_or_404(Post.objects.visible().only('pk'), pk=post_id)
+    if like(request.user, post.pk):
+        bump_state(request.user.pk)
+    return redirect_back(request, post_id)
+
+
+@require_POST
+@login_required
+def unlike_post(request, post_id):
+    if unlike(request.user, post_id):
+        bump_state(request.user.pk)
+    return redirect_back(request, post_id)
+
+
 @login_required
 def follow_index(request):
     user = request.user
-    posts = Post.objects.filter(
-        author__following__user=user
-    )
-    page_obj = get_paginator(posts, request)
+    page_obj = cached_page(user, request)
+    load_viewer_state(user, page_obj)
     context = {
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'suggestions': get_suggestions(user),
     }
     return render(request, 'posts/follow.html', context)
 
 
+@login_required
+def notifications(request):
+    user = request.user
+    page_obj = get_paginator(digests(user), request)
+    context = {
+        'page_obj': page_obj,
+        'digests': list(page_obj),
+    }
+    mark_read(user)
+    return render(request, 'posts/notifications.html', context)
+
+
 @login_required
 def profile_follow(request, username):
     user = request.user
-    author = get_object_or_404(User, username=username)
-    if author != user:
-        user.follower.get_or_create(
-            user=user,
-            author=author
-        )
+    author = get_object_or_404(
+        User, username=username, tombstone__isnull=True
+    )
+    follow_many(user, [author.pk])
     return redirect('posts:profile', username)
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    Follow.objects.filter(
-        user=request.user,
-        author=author,
-    ).delete()
+    unfollow_many(
+        request.user,
+        User.objects.filter(username=username).values('pk'),
+    )
     return redirect('posts:profile', username)
+
+
+@staff_member_required
+def export(request, kind):
+    export_format = request.GET.get('format', 'ndjson')
+    try:
+        rows = exports.export_rows(
+            kind,
+            since=exports.parse_moment(request.GET.get('since')),
+            until=exports.parse_moment(request.GET.get('until')),
+            group=request.GET.get('group'),
+        )
+        content = exports.render(kind, rows, export_format)
+    except exports.ExportError as error:
+        return HttpResponseBadRequest(str(error))
+    response = StreamingHttpResponse(
+        content,
+        content_type=exports.FORMATS[export_format],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{kind}.{export_format}"'
+    )
+    return response
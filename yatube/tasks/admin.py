@@ -0,0 +1,31 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        "pk",
+        "name",
+        "status",
+        "priority",
+        "attempts",
+        "progress_display",
+        "run_at",
+        "finished",
+    )
+    list_filter = ("status", "name")
+    search_fields = ("name",)
+    readonly_fields = (
+        "created", "started", "heartbeat", "finished", "last_error",
+        "progress", "total",
+    )
+
+    def progress_display(self, obj):
+        if obj.total is None:
+            return obj.progress or "-"
+        return f"{obj.progress} / {obj.total}"
+    progress_display.short_description = "Прогресс"
+
+
+admin.site.register(Task, TaskAdmin)
@@ -0,0 +1,72 @@
+import multiprocessing
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from tasks.queue import claim, execute, purge_done, requeue_stale
+
+PROCESSES = 2
+POLL_INTERVAL = 1.0
+PURGE_INTERVAL = 60 * 60
+
+
+def init_worker():
+    # Соединения родителя нельзя делить с дочерними процессами.
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Запускает воркер фоновых задач.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=PROCESSES,
+            help='Размер пула процессов; 0 — выполнять в текущем процессе.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и выйти.',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=POLL_INTERVAL,
+            help='Пауза между опросами пустой очереди, в секундах.',
+        )
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+        pool = None
+        if processes:
+            connections.close_all()
+            pool = multiprocessing.Pool(processes, initializer=init_worker)
+        try:
+            self.loop(pool, max(processes, 1), options)
+        except KeyboardInterrupt:
+            self.stdout.write('Остановка воркера.')
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    def loop(self, pool, limit, options):
+        done = failed = 0
+        next_purge = 0
+        while True:
+            if time.monotonic() >= next_purge:
+                purge_done()
+                next_purge = time.monotonic() + PURGE_INTERVAL
+            requeue_stale()
+            claimed = claim(limit)
+            if pool is None:
+                results = [execute(pk) for pk in claimed]
+            else:
+                results = pool.map(execute, claimed)
+            done += results.count(True)
+            failed += results.count(False)
+            if not claimed:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {done}, с ошибкой: {failed}.'
+        ))
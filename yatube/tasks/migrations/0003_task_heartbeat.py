@@ -0,0 +1,25 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:48
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_heartbeats(apps, schema_editor):
+    Task = apps.get_model('tasks', 'Task')
+    Task.objects.filter(heartbeat__isnull=True).update(heartbeat=F('started'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_task_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='heartbeat',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Последний признак жизни'),
+        ),
+        migrations.RunPython(backfill_heartbeats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+from django.db import models
+from django.utils import timezone
+
+from core.models import CreatedModel
+
+
+class Task(CreatedModel):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField('Функция', max_length=200)
+    payload = models.TextField('Аргументы', default='{}')
+    priority = models.SmallIntegerField('Приоритет', default=0)
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField('Попытки', default=0)
+    max_attempts = models.PositiveSmallIntegerField(
+        'Максимум попыток',
+        default=3,
+    )
+    run_at = models.DateTimeField('Запустить после', default=timezone.now)
+    started = models.DateTimeField('Начало', null=True, blank=True)
+    heartbeat = models.DateTimeField(
+        'Последний признак жизни',
+        null=True,
+        blank=True,
+    )
+    finished = models.DateTimeField('Окончание', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    progress = models.PositiveIntegerField('Обработано', default=0)
+    total = models.PositiveIntegerField('Всего', null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.name} [{self.get_status_display()}]'
+
+    class Meta:
+        ordering = ['-priority', 'run_at']
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Задачи'
+        indexes = [
+            models.Index(
+                fields=['status', '-priority', 'run_at'],
+                name='task_ready_idx',
+            ),
+        ]
@@ -0,0 +1,191 @@
+import json
+import logging
+import threading
+import traceback
+from contextvars import ContextVar
+from datetime import timedelta
+from functools import wraps
+
+from django.db import DatabaseError, close_old_connections, connections
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+RETRY_DELAY = 30
+STALE_AFTER = 10 * 60
+HEARTBEAT_INTERVAL = STALE_AFTER / 4
+KEEP_DONE_FOR = 7 * 24 * 60 * 60
+
+current_task = ContextVar('current_task', default=None)
+
+
+def task(priority=0, max_attempts=3):
+    """
+    Регистрирует функцию как фоновую задачу.
+
+    У функции появляется метод delay(), который ставит вызов в очередь.
+    Аргументы должны сериализоваться в JSON.
+    """
+    def decorator(func):
+        func.task_options = {
+            'priority': priority,
+            'max_attempts': max_attempts,
+        }
+
+        @wraps(func)
+        def delay(*args, **kwargs):
+            return enqueue(func, *args, **kwargs)
+
+        func.delay = delay
+        return func
+    return decorator
+
+
+def enqueue(func, *args, priority=None, run_at=None, **kwargs):
+    """
+    Записывает задачу в очередь в текущей транзакции.
+
+    Воркер увидит строку только после коммита, поэтому при откате
+    транзакции задача пропадает вместе с данными, которые её породили.
+    """
+    options = func.task_options
+    return Task.objects.create(
+        name=f'{func.__module__}.{func.__name__}',
+        payload=json.dumps({'args': args, 'kwargs': kwargs}),
+        priority=options['priority'] if priority is None else priority,
+        max_attempts=options['max_attempts'],
+        run_at=run_at or timezone.now(),
+    )
+
+
+def report_progress(progress, total=None):
+    """
+    Записывает прогресс выполняемой задачи.
+
+    Пишется отдельным UPDATE вне транзакций задачи, поэтому виден в
+    админке сразу. Заодно обновляет heartbeat: долгая задача, которая
+    отчитывается, не считается зависшей. Вне воркера ничего не делает.
+    """
+    pk = current_task.get()
+    if pk is None:
+        return
+    fields = {'progress': progress, 'heartbeat': timezone.now()}
+    if total is not None:
+        fields['total'] = total
+    Task.objects.filter(pk=pk).update(**fields)
+
+
+def keep_alive(pk, stop, interval=HEARTBEAT_INTERVAL):
+    """
+    Обновляет heartbeat задачи, пока не выставлен stop.
+
+    Работает в отдельном потоке воркера, поэтому задача, которая долго
+    не сообщает прогресс, не считается зависшей, пока её процесс жив.
+    """
+    while not stop.wait(interval):
+        try:
+            Task.objects.filter(pk=pk).update(heartbeat=timezone.now())
+        except DatabaseError:
+            logger.warning(
+                'Не удалось обновить heartbeat задачи %s.', pk, exc_info=True
+            )
+        finally:
+            # Соединения этого потока не должны висеть между обновлениями.
+            connections.close_all()
+
+
+def requeue_stale(stale_after=STALE_AFTER):
+    """
+    Возвращает в очередь задачи, чей воркер, похоже, упал: от них не было
+    heartbeat дольше stale_after секунд. Пока задача выполняется, heartbeat
+    раз в HEARTBEAT_INTERVAL обновляет поток keep_alive в её воркере.
+
+    Задачи, исчерпавшие попытки, в очередь не возвращаются, а помечаются
+    ошибкой: иначе задача, роняющая воркер, повторялась бы вечно.
+    """
+    now = timezone.now()
+    stale = Task.objects.filter(
+        status=Task.RUNNING,
+        heartbeat__lt=now - timedelta(seconds=stale_after),
+    )
+    stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Task.FAILED,
+        finished=now,
+        last_error='Воркер не завершил задачу за отведённое время.',
+    )
+    return stale.update(status=Task.PENDING)
+
+
+def purge_done(keep_for=KEEP_DONE_FOR):
+    """Удаляет выполненные задачи старше keep_for секунд."""
+    deadline = timezone.now() - timedelta(seconds=keep_for)
+    deleted, _ = Task.objects.filter(
+        status=Task.DONE,
+        finished__lt=deadline,
+    ).delete()
+    return deleted
+
+
+def claim(limit):
+    """Атомарно забирает до limit готовых задач и возвращает их id."""
+    now = timezone.now()
+    candidates = Task.objects.filter(
+        status=Task.PENDING,
+        run_at__lte=now,
+    ).values_list('pk', flat=True)[:limit]
+    claimed = []
+    for pk in candidates:
+        updated = Task.objects.filter(pk=pk, status=Task.PENDING).update(
+            status=Task.RUNNING,
+            attempts=F('attempts') + 1,
+            started=now,
+            heartbeat=now,
+        )
+        if updated:
+            claimed.append(pk)
+    return claimed
+
+
+def execute(pk):
+    """Выполняет забранную задачу и фиксирует результат или повтор."""
+    close_old_connections()
+    task = Task.objects.get(pk=pk)
+    token = current_task.set(pk)
+    stop = threading.Event()
+    heartbeat = threading.Thread(
+        target=keep_alive, args=(pk, stop), name=f'task-heartbeat-{pk}',
+        daemon=True,
+    )
+    heartbeat.start()
+    try:
+        func = import_string(task.name)
+        if not hasattr(func, 'task_options'):
+            raise ValueError(f'{task.name} не зарегистрирована как задача')
+        payload = json.loads(task.payload)
+        func(*payload['args'], **payload['kwargs'])
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Задача %s (%s) упала:\n%s', pk, task.name, error)
+        if task.attempts >= task.max_attempts:
+            task.status = Task.FAILED
+            task.finished = timezone.now()
+        else:
+            task.status = Task.PENDING
+            task.run_at = timezone.now() + timedelta(
+                seconds=RETRY_DELAY * 2 ** (task.attempts - 1)
+            )
+        task.last_error = error
+        task.save(update_fields=['status', 'finished', 'run_at', 'last_error'])
+        return False
+    finally:
+        stop.set()
+        heartbeat.join()
+        current_task.reset(token)
+    task.status = Task.DONE
+    task.finished = timezone.now()
+    task.save(update_fields=['status', 'finished'])
+    return True
@@ -0,0 +1,152 @@
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Task
+from .queue import (
+    KEEP_DONE_FOR, STALE_AFTER, current_task, keep_alive, purge_done,
+    report_progress, requeue_stale, task,
+)
+
+calls = []
+
+
+@task(priority=5)
+def remember(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def explode():
+    raise RuntimeError('boom')
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def run_worker(self):
+        call_command('run_tasks', once=True, processes=0, stdout=StringIO())
+
+    def test_delay_creates_pending_task(self):
+        """delay() записывает задачу с приоритетом из декоратора."""
+        remember.delay(1)
+        task = Task.objects.get()
+        self.assertEqual(task.name, 'tasks.tests.remember')
+        self.assertEqual(task.priority, 5)
+        self.assertEqual(task.status, Task.PENDING)
+
+    def test_worker_runs_tasks_by_priority(self):
+        """Воркер выполняет задачи, начиная с приоритетных."""
+        remember.delay('low', priority=0)
+        remember.delay('high')
+        self.run_worker()
+        self.assertEqual(calls, ['high', 'low'])
+        self.assertFalse(Task.objects.exclude(status=Task.DONE).exists())
+
+    def test_failed_task_retried_then_failed(self):
+        """Упавшая задача откладывается, а после лимита попыток — ошибка."""
+        explode.delay()
+        self.run_worker()
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.PENDING)
+        self.assertIn('boom', task.last_error)
+        Task.objects.update(run_at=task.created)
+        self.run_worker()
+        task.refresh_from_db()
+        self.assertEqual(task.status, Task.FAILED)
+        self.assertEqual(task.attempts, 2)
+
+    @override_settings(
+        EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend'
+    )
+    def test_password_reset_mail_sent_from_queue(self):
+        """Письмо сброса пароля уходит только после работы воркера."""
+        get_user_model().objects.create_user(
+            username='user', email='user@example.com', password='secret'
+        )
+        self.client.post(
+            '/auth/password_reset/', {'email': 'user@example.com'}
+        )
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertNotIn('/reset/', Task.objects.get().payload)
+        self.run_worker()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('/reset/', mail.outbox[0].body)
+
+    def test_stale_task_failed_after_max_attempts(self):
+        """Зависшая задача без попыток в запасе не возвращается в очередь."""
+        started = timezone.now() - timedelta(seconds=STALE_AFTER + 1)
+        retry = explode.delay()
+        last = explode.delay()
+        Task.objects.filter(pk=retry.pk).update(
+            status=Task.RUNNING, attempts=1, heartbeat=started
+        )
+        Task.objects.filter(pk=last.pk).update(
+            status=Task.RUNNING, attempts=2, heartbeat=started
+        )
+        self.assertEqual(requeue_stale(), 1)
+        retry.refresh_from_db()
+        last.refresh_from_db()
+        self.assertEqual(retry.status, Task.PENDING)
+        self.assertEqual(last.status, Task.FAILED)
+
+    def test_progress_keeps_long_task_alive(self):
+        """Задача, сообщающая прогресс, не считается зависшей."""
+        long_ago = timezone.now() - timedelta(seconds=STALE_AFTER + 1)
+        running = remember.delay(1)
+        Task.objects.filter(pk=running.pk).update(
+            status=Task.RUNNING, started=long_ago, heartbeat=long_ago
+        )
+        token = current_task.set(running.pk)
+        try:
+            report_progress(10)
+        finally:
+            current_task.reset(token)
+        self.assertEqual(requeue_stale(), 0)
+        running.refresh_from_db()
+        self.assertEqual(running.status, Task.RUNNING)
+        self.assertEqual(running.progress, 10)
+
+    def test_heartbeat_keeps_silent_task_alive(self):
+        """Задачу без отчётов о прогрессе держит живой поток воркера."""
+        long_ago = timezone.now() - timedelta(seconds=STALE_AFTER + 1)
+        running = remember.delay(1)
+        Task.objects.filter(pk=running.pk).update(
+            status=Task.RUNNING, started=long_ago, heartbeat=long_ago
+        )
+        stop = mock.Mock(**{'wait.side_effect': [False, True]})
+        keep_alive(running.pk, stop)
+        self.assertEqual(requeue_stale(), 0)
+        running.refresh_from_db()
+        self.assertEqual(running.status, Task.RUNNING)
+
+    def test_heartbeat_stopped_after_task(self):
+        """После выполнения задачи поток heartbeat не остаётся висеть."""
+        remember.delay(1)
+        self.run_worker()
+        self.assertFalse(any(
+            thread.name.startswith('task-heartbeat-')
+            for thread in threading.enumerate()
+        ))
+
+    def test_old_done_tasks_purged(self):
+        """Давно выполненные задачи удаляются, свежие и упавшие остаются."""
+        old = timezone.now() - timedelta(seconds=KEEP_DONE_FOR + 1)
+        for status, finished in (
+            (Task.DONE, old),
+            (Task.DONE, timezone.now()),
+            (Task.FAILED, old),
+        ):
+            Task.objects.filter(pk=remember.delay(1).pk).update(
+                status=status, finished=finished
+            )
+        self.assertEqual(purge_done(), 1)
+        self.assertEqual(Task.objects.count(), 2)
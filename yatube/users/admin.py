@@ -0,0 +1,17 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+
+from core.admin import TombstoneAdminMixin
+from posts.deletion import delete_user
+
+User = get_user_model()
+
+
+class UserAdmin(TombstoneAdminMixin, BaseUserAdmin):
+    def tombstone(self, obj):
+        delete_user(obj)
+
+
+admin.site.unregister(User)
+admin.site.register(User, UserAdmin)
@@ -1,11 +1,31 @@
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
 from django.contrib.auth import get_user_model
 
+from .tasks import send_password_reset
 
 User = get_user_model()
 
+PRIVATE_CONTEXT = ('email', 'user', 'uid', 'token')
+
 
 class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+
+class QueuedPasswordResetForm(PasswordResetForm):
+    """Письмо сбрасывания пароля рендерится и уходит из очереди."""
+
+    def send_mail(self, subject_template_name, email_template_name,
+                  context, from_email, to_email,
+                  html_email_template_name=None):
+        # Токен не должен лежать в таблице задач: его выпустит воркер.
+        public = {
+            key: value for key, value in context.items()
+            if key not in PRIVATE_CONTEXT
+        }
+        send_password_reset.delay(
+            context['user'].pk, subject_template_name, email_template_name,
+            public, from_email, html_email_template_name,
+        )
@@ -7,6 +7,7 @@ from django.contrib.auth.views import (
 from django.urls import path
 from django.urls import reverse_lazy
 from . import views
+from .forms import QueuedPasswordResetForm
 
 app_name = 'users'
 
@@ -41,6 +42,7 @@ urlpatterns = [
         'password_reset/',
         PasswordResetView.as_view(
             template_name='users/password_reset_form.html',
+            form_class=QueuedPasswordResetForm,
             success_url=reverse_lazy('users:password_reset_done'),
         ),
         name='password_reset_form'
@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     "core.apps.CoreConfig",
     "users.apps.UsersConfig",
     "posts.apps.PostsConfig",
+    "tasks.apps.TasksConfig",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -58,6 +59,7 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'core.ratelimit.RateLimitMiddleware',
 ]
 
 INTERNAL_IPS = [
@@ -157,3 +159,30 @@ CACHES = {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
+
+POST_IMAGE_MAX_SIZE = (1920, 1920)
+POST_IMAGE_QUALITY = 85
+
+# Ограничение частоты записей: скользящие окна по имени URL,
+# отдельно на пользователя и на IP. Формат — 'запросов/s|m|h|d'.
+# Счётчики живут в кеше default: LocMem считает каждый процесс
+# отдельно, для нескольких процессов нужен общий кеш (Memcached, Redis).
+RATE_LIMITS = {
+    'posts:post_create': {'user': '10/m', 'ip': '60/m'},
+    'posts:add_comment': {'user': '20/m', 'ip': '120/m'},
+    'posts:profile_follow': {
+        'user': '30/m',
+        'ip': '120/m',
+        'methods': ('GET', 'POST'),
+    },
+    'posts:api_follows': {'user': '30/m', 'ip': '120/m'},
+    'users:signup': {'ip': '5/h'},
+}
+# Если запись в среднем дольше порога (в секундах), такие запросы
+# получают 503 на время паузы.
+LOAD_SHEDDING_LATENCY = 1.0
+LOAD_SHEDDING_COOLDOWN = 5
+# Просмотры постов копятся в памяти процесса и пишутся в базу пачкой
+# раз в интервал (в секундах) или когда в буфере набралось столько постов.
+VIEW_COUNT_FLUSH_INTERVAL = 10
+VIEW_COUNT_FLUSH_SIZE = 1000